@@ -38,6 +38,15 @@ from model_manager import ClientModelManager, deserialize_model_state, serialize
 from ppm.dp import DifferentialPrivacy
 from ppm.he import HomomorphicEncryption
 
+# Must match the server's limits: model payloads exceed gRPC's 4 MiB default message cap.
+MAX_MESSAGE_LENGTH = 64 * 1024 * 1024
+GRPC_CHANNEL_OPTIONS = [
+    ('grpc.max_send_message_length', MAX_MESSAGE_LENGTH),
+    ('grpc.max_receive_message_length', MAX_MESSAGE_LENGTH),
+    ('grpc.http2.max_frame_size', 1 << 20),
+    ('grpc.http2.write_buffer_size', 1 << 20),
+]
+
 # Client-side wrapper for Secret Sharing
 class SecretSharing:
     """Client-side class for splitting a model update into shares."""
@@ -51,7 +60,8 @@ class SecretSharing:
     def split_model(self, state_dict: Dict[str, Any]) -> List[bytes]:
         """Serializes and splits a model state dictionary into secret share bundles."""
         self.logger.info(f"Splitting model state into {self.num_shares} share bundles with a threshold of {self.threshold}.")
-        share_bundles = self.sss_handler.split_model(state_dict)
+        # Raw tensor framing lets the server view the reconstructed bytes as tensors without another copy.
+        share_bundles = self.sss_handler.split_bytes(serialize_model_state(state_dict, MODEL_UPDATE_TRANSFER_DTYPE))
         self.logger.info(f"Model state split into {len(share_bundles)} bundles.")
         return share_bundles
 
@@ -63,6 +73,9 @@ CLIENT_ID_FILE = "client_id.txt"
 CERT_DIR = os.path.join(current_dir, "cscpm", "certifications")
 API_PORT = 8000
 HEARTBEAT_INTERVAL = 1 # seconds
+# Model updates are small deltas: bfloat16 keeps float32's exponent range (float16 would flush them to zero) at half the bytes.
+# "int8" quantizes each tensor with its own scale for a quarter of the float32 size.
+MODEL_UPDATE_TRANSFER_DTYPE = getattr(torch, os.getenv("MODEL_UPDATE_TRANSFER_DTYPE", "bfloat16"))
 
 # --- Privacy Preferences API (for dash.py) ---
 class PrivacyPreferences:
@@ -208,7 +221,7 @@ class Client:
             logger.error(f"Error creating mTLS credentials: {e}", exc_info=True)
             return False
 
-        channel_options = [('grpc.ssl_target_name_override', 'localhost')]
+        channel_options = [('grpc.ssl_target_name_override', 'localhost')] + GRPC_CHANNEL_OPTIONS
         
         self.secure_channel = grpc.aio.secure_channel(self.secure_server_address, credentials, options=channel_options)
         self.client_service_stub = client_service_pb2_grpc.ClientServiceStub(self.secure_channel)
@@ -266,7 +279,7 @@ class Client:
             
             if current_preference == "HE":
                 logger.info("Using Homomorphic Encryption.")
-                encrypted_updated_model_data = self.he_handler.encrypt_model_state(model_update)
+                encrypted_updated_model_data = self.he_handler.encrypt_bytes(serialize_model_state(model_update, MODEL_UPDATE_TRANSFER_DTYPE))
                 
                 update_request = client_service_pb2.SendModelUpdateRequest(
                     client_id=self.client_id,
@@ -286,26 +299,34 @@ class Client:
                 client_to_drop = os.getenv("CLIENT_ID_TO_DROP")
                 is_dropout_client = (client_to_drop == self.client_id)
 
-                for i, bundle_data in enumerate(share_bundles):
-                    update_request = client_service_pb2.SendModelUpdateSharesRequest(
+                # A dropout client only gets the threshold number of bundles out before exiting.
+                bundles_to_send = share_bundles[:self.sss_handler.threshold] if is_dropout_client else share_bundles
+                update_requests = [
+                    client_service_pb2.SendModelUpdateSharesRequest(
                         client_id=self.client_id,
                         share_index=i,
                         total_shares=len(share_bundles),
                         share_data=bundle_data 
                     )
-                    update_response = await self.client_service_stub.SendModelUpdateShares(update_request, timeout=60)
+                    for i, bundle_data in enumerate(bundles_to_send)
+                ]
+                # Send the bundles concurrently: they share the channel's HTTP/2 writes instead of costing a round trip each.
+                update_responses = await asyncio.gather(*(
+                    self.client_service_stub.SendModelUpdateShares(update_request, timeout=60) for update_request in update_requests
+                ))
+                for i, update_response in enumerate(update_responses):
                     if update_response.success:
                         logger.info(f"Successfully sent share bundle {i+1}/{len(share_bundles)} to the server.")
                     else:
                         logger.error(f"Failed to send share bundle {i+1}/{len(share_bundles)}: {update_response.message}")
 
-                    if is_dropout_client and i == (self.sss_handler.threshold - 1):
-                        logger.warning(f"SIMULATING DROPOUT for client {self.client_id}. Exiting.")
-                        sys.exit(0)
+                if is_dropout_client:
+                    logger.warning(f"SIMULATING DROPOUT for client {self.client_id}. Exiting.")
+                    sys.exit(0)
             
             elif current_preference == "Normal":
                 logger.info("Using Normal (plaintext) update.")
-                serialized_update = serialize_model_state(model_update)
+                serialized_update = serialize_model_state(model_update, MODEL_UPDATE_TRANSFER_DTYPE)
 
                 update_request = client_service_pb2.SendModelUpdateRequest(
                     client_id=self.client_id,
@@ -4,10 +4,12 @@ import logging
 import torch
 import torch.nn as nn
 from torch.utils.data import DataLoader, Dataset
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import random
 import io
 import os
+import json
+import struct
 import pandas as pd
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 import numpy as np
@@ -17,21 +19,61 @@ import torch.nn.functional as F
 logger = logging.getLogger(__name__)
 
 # --- UTILITY FUNCTIONS ---
+# Raw tensor framing shared with the server: MAGIC, 4-byte little-endian header length,
+# JSON header of [name, dtype, shape, nbytes] entries, then each tensor's bytes back to back.
+# An int8-quantized float tensor's entry carries a fifth element, its scale.
+STATE_DICT_MAGIC = b"FLSD"
+STATE_DICT_HEADER_LEN = struct.Struct("<I")
+
 def deserialize_model_state(data: bytes) -> Dict[str, Any]:
     """
     Deserializes a byte stream back into a PyTorch model state dictionary.
     """
-    buffer = io.BytesIO(data)
-    # Load the model state and map it to the CPU to avoid CUDA errors on non-GPU clients
-    return torch.load(buffer, map_location='cpu')
-
-def serialize_model_state(state_dict: Dict[str, Any]) -> bytes:
+    if not data.startswith(STATE_DICT_MAGIC):
+        # Load the model state and map it to the CPU to avoid CUDA errors on non-GPU clients
+        return torch.load(io.BytesIO(data), map_location='cpu', weights_only=True)
+    (header_len,) = STATE_DICT_HEADER_LEN.unpack_from(data, 4)
+    header = json.loads(data[8:8 + header_len])
+    # One writable copy of the message, unless it already is one; every tensor is a view into it.
+    buffer = data if isinstance(data, bytearray) else bytearray(data)
+    offset = 8 + header_len
+    state_dict = {}
+    for name, dtype_name, shape, nbytes, *scale in header:
+        tensor_dtype = getattr(torch, dtype_name)
+        count = nbytes // torch.empty((), dtype=tensor_dtype).element_size()
+        tensor = torch.frombuffer(buffer, dtype=tensor_dtype, count=count, offset=offset).reshape(shape) if count else torch.empty(shape, dtype=tensor_dtype)
+        # Quantized tensors come back as float32, ready for aggregation.
+        state_dict[name] = tensor.to(torch.float32).mul_(scale[0]) if scale else tensor
+        offset += nbytes
+    return state_dict
+
+def _quantize_int8(tensor: torch.Tensor):
+    """Symmetric per-tensor int8 quantization; returns the int8 tensor and its float scale."""
+    tensor = tensor.to(torch.float32)
+    scale = tensor.abs().max().item() / 127.0 if tensor.numel() else 0.0
+    if scale == 0.0: scale = 1.0
+    return torch.round(tensor / scale).clamp_(-127, 127).to(torch.int8), scale
+
+def serialize_model_state(state_dict: Dict[str, Any], dtype: Optional[torch.dtype] = None) -> bytes:
     """
     Serializes a PyTorch model state dictionary into a byte stream.
+    Floating-point tensors are cast to `dtype` first when one is given; torch.int8
+    quantizes each of them symmetrically with a per-tensor scale.
     """
-    buffer = io.BytesIO()
-    torch.save(state_dict, buffer)
-    return buffer.getvalue()
+    header, payloads = [], []
+    for name, tensor in state_dict.items():
+        tensor = tensor.detach().cpu()
+        scale = None
+        if dtype is torch.int8 and tensor.is_floating_point(): tensor, scale = _quantize_int8(tensor)
+        elif dtype is not None and tensor.is_floating_point(): tensor = tensor.to(dtype)
+        # A memoryview over the tensor's own storage; the final join is the only copy of the data.
+        raw = memoryview(tensor.contiguous().reshape(-1).view(torch.uint8).numpy())
+        entry = [name, str(tensor.dtype).split(".")[-1], list(tensor.shape), raw.nbytes]
+        if scale is not None: entry.append(scale)
+        header.append(entry)
+        payloads.append(raw)
+    header_bytes = json.dumps(header).encode("utf-8")
+    return b"".join([STATE_DICT_MAGIC, STATE_DICT_HEADER_LEN.pack(len(header_bytes)), header_bytes, *payloads])
 
 
 # --- MODEL DEFINITION: SimpleFCN (MATCHES DEEPER SERVER MODEL) ---
@@ -93,11 +135,10 @@ def load_wustl_iiot_train_data(cfg: Dict[str, Any], client_id: str):
         logger.error(f"Dataset file not found at: {file_path}. Cannot load client data.")
         return None, 41, 2 
 
-    df = pd.read_csv(file_path)
-    
     # Preprocessing (must match the server's data_loader.py)
-    columns_to_drop = ['StartTime', 'LastTime', 'SrcAddr', 'DstAddr', 'sIpId', 'dIpId']
-    df = df.drop(columns=columns_to_drop, errors='ignore')
+    # Dropped columns are skipped at parse time, so the timestamp and address strings are never materialised.
+    columns_to_drop = {'StartTime', 'LastTime', 'SrcAddr', 'DstAddr', 'sIpId', 'dIpId'}
+    df = pd.read_csv(file_path, usecols=lambda column: column not in columns_to_drop)
     
     label_column = df.columns[-1] 
     X = df.drop(columns=[label_column])
@@ -1,10 +1,10 @@
 # he.py
 
-import torch
 import logging
-import io
 from typing import Dict, Any
 
+from model_manager import serialize_model_state, deserialize_model_state
+
 class HomomorphicEncryption:
     """
     A placeholder class for Homomorphic Encryption (HE).
@@ -20,21 +20,25 @@ class HomomorphicEncryption:
         Mocks the encryption of a model state dictionary.
         """
         self.logger.info("Encrypting model state with Homomorphic Encryption.")
-        buffer = io.BytesIO()
-        torch.save(state_dict, buffer)
-        encrypted_bytes = buffer.getvalue()
+        encrypted_bytes = serialize_model_state(state_dict)
         
         self.logger.info("Model state encrypted. Sending to server.")
         return encrypted_bytes
 
+    def encrypt_bytes(self, plaintext: bytes) -> bytes:
+        """
+        Mocks the encryption of an already serialized model state.
+        """
+        self.logger.info("Encrypting serialized model state with Homomorphic Encryption.")
+        return plaintext
+
     def decrypt_model_state(self, encrypted_bytes: bytes) -> Dict[str, Any]:
         """
         Mocks the decryption of an encrypted model state.
         """
         self.logger.info("Decrypting model state from server.")
         
-        buffer = io.BytesIO(encrypted_bytes)
-        state_dict = torch.load(buffer, map_location='cpu')
+        state_dict = deserialize_model_state(encrypted_bytes)
             
         self.logger.info("Model state decrypted successfully.")
         return state_dict
\ No newline at end of file
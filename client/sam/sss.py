@@ -1,11 +1,11 @@
-import torch
 import numpy as np
 import logging
-import io
 import json
 from typing import Dict, Any, List
 from collections import defaultdict
 
+from model_manager import serialize_model_state, deserialize_model_state
+
 
 class _SecretSharer:
     """
@@ -76,16 +76,19 @@ class SecretSharing:
         )
 
     def split_model(self, state_dict: Dict[str, Any]) -> List[bytes]:
+        """Serializes a model with the raw tensor framing and splits the bytes into share bundles."""
+        return self.split_bytes(serialize_model_state(state_dict))
+
+    def split_bytes(self, model_bytes: bytes) -> List[bytes]:
         """
-        Serializes a model, breaks it into chunks, creates secret shares for each chunk,
-        and bundles them into a single JSON payload.
+        Breaks serialized model bytes into chunks, creates secret shares for each chunk,
+        and bundles them into one JSON payload per share holder. A bundle stores the
+        holder's x coordinate once and its y values as a single list indexed by chunk.
         """
-        buffer = io.BytesIO()
-        torch.save(state_dict, buffer)
-        model_bytes = buffer.getvalue()
         original_length = len(model_bytes)
 
-        all_shares_by_server = [[] for _ in range(self.num_shares)]
+        share_xs = [0] * self.num_shares
+        share_ys = [[] for _ in range(self.num_shares)]
 
         for chunk_index, i in enumerate(range(0, original_length, self.CHUNK_SIZE)):
             chunk = model_bytes[i:i + self.CHUNK_SIZE]
@@ -96,14 +99,14 @@ class SecretSharing:
 
             shares_for_chunk = _SecretSharer.split_secret(chunk_int, self.threshold, self.num_shares)
 
-            for share_idx, share_tuple in enumerate(shares_for_chunk):
-                payload = {"c": chunk_index, "s": list(share_tuple)}
-                all_shares_by_server[share_idx].append(payload)
+            for share_idx, (x, y) in enumerate(shares_for_chunk):
+                share_xs[share_idx] = x
+                share_ys[share_idx].append(y)
 
-        final_payloads = []
-        for server_shares in all_shares_by_server:
-            bundle = {"l": original_length, "d": server_shares}
-            final_payloads.append(json.dumps(bundle).encode('utf-8'))
+        final_payloads = [
+            json.dumps({"l": original_length, "x": x, "y": ys}).encode('utf-8')
+            for x, ys in zip(share_xs, share_ys)
+        ]
 
         self.logger.info(
             f"Model of size {original_length} bytes split into {self.num_shares} bundles."
@@ -114,12 +117,26 @@ class SecretSharing:
         """
         Reconstructs the original model from a list of share bundles.
         """
+        final_bytes = self.reconstruct_bytes(shares_payloads)
+        try:
+            reconstructed_state_dict = deserialize_model_state(final_bytes)
+            self.logger.info("Model reconstructed successfully from shares.")
+            return reconstructed_state_dict
+        except Exception as e:
+            self.logger.error(f"Error deserializing reconstructed model: {e}", exc_info=True)
+            raise RuntimeError("Failed to deserialize the final reconstructed model.")
+
+    def reconstruct_bytes(self, shares_payloads: List[bytes]) -> bytearray:
+        """
+        Reconstructs the original serialized bytes from a list of share bundles.
+        """
         if len(shares_payloads) < self.threshold:
             raise ValueError(
                 f"Insufficient share bundles provided. Required at least {self.threshold}, got {len(shares_payloads)}."
             )
 
         grouped_shares_by_chunk = defaultdict(list)
+        share_columns = []
         original_length = None
 
         for share_bundle_bytes in shares_payloads:
@@ -127,7 +144,12 @@ class SecretSharing:
                 bundle = json.loads(share_bundle_bytes.decode('utf-8'))
                 if original_length is None:
                     original_length = bundle["l"]
-                
+
+                if "y" in bundle:
+                    share_columns.append((bundle["x"], bundle["y"]))
+                    continue
+
+                # Legacy bundle with one {"c": chunk_index, "s": [x, y]} record per chunk.
                 for payload in bundle["d"]:
                     chunk_index = payload["c"]
                     share_tuple = tuple(payload["s"])
@@ -140,6 +162,10 @@ class SecretSharing:
         if original_length is None:
             raise RuntimeError("Failed to find original model length. Reconstruction aborted.")
 
+        for x, ys in share_columns:
+            for chunk_index, y in enumerate(ys):
+                grouped_shares_by_chunk[chunk_index].append((x, y))
+
         reconstructed_chunk_ints = {}
         total_expected_chunks = (original_length + self.CHUNK_SIZE - 1) // self.CHUNK_SIZE
 
@@ -151,31 +177,16 @@ class SecretSharing:
         if len(reconstructed_chunk_ints) != total_expected_chunks:
              raise RuntimeError(f"Failed to reconstruct all chunks. Reconstructed {len(reconstructed_chunk_ints)} out of {total_expected_chunks} expected chunks.")
 
-        num_full_chunks = original_length // self.CHUNK_SIZE
-        size_of_last_chunk = original_length % self.CHUNK_SIZE
-        
-        byte_pieces = []
-        for i in sorted(reconstructed_chunk_ints.keys()):
-            chunk_int = reconstructed_chunk_ints[i]
-            if i < num_full_chunks:
-                byte_pieces.append(chunk_int.to_bytes(self.CHUNK_SIZE, 'big'))
-            else:
-                if size_of_last_chunk > 0:
-                    byte_pieces.append(chunk_int.to_bytes(size_of_last_chunk, 'big'))
-
-        final_bytes = b"".join(byte_pieces)
-
-        if len(final_bytes) != original_length:
-            raise RuntimeError(
-                f"Reconstruction failed: Mismatch between final byte length ({len(final_bytes)}) "
-                f"and original length ({original_length})."
-            )
-
-        try:
-            buffer = io.BytesIO(final_bytes)
-            reconstructed_state_dict = torch.load(buffer, map_location="cpu", weights_only=False)
-            self.logger.info("Model reconstructed successfully from shares.")
-            return reconstructed_state_dict
-        except Exception as e:
-            self.logger.error(f"Error deserializing reconstructed model: {e}", exc_info=True)
-            raise RuntimeError("Failed to deserialize the final reconstructed model.")
\ No newline at end of file
+        # Write each chunk straight into its slot of a buffer sized from the bundle header,
+        # instead of collecting per-chunk bytes objects and joining them afterwards.
+        final_bytes = bytearray(original_length)
+        view = memoryview(final_bytes)
+        for i, chunk_int in reconstructed_chunk_ints.items():
+            start = i * self.CHUNK_SIZE
+            end = min(start + self.CHUNK_SIZE, original_length)
+            if start >= original_length:
+                raise RuntimeError(
+                    f"Reconstruction failed: chunk {i} lies beyond the original length ({original_length})."
+                )
+            view[start:end] = chunk_int.to_bytes(end - start, 'big')
+        return final_bytes
\ No newline at end of file
@@ -2,7 +2,7 @@
 
 import torch
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from . import config
 from .logger_setup import setup_loggers
@@ -74,22 +74,33 @@ class ADRMEngine:
 
         return True
 
-    def _get_update_magnitude(self, update: Dict[str, Any]) -> float:
-        """Helper to calculate the L2-norm for the statistical peer check."""
-        if not update: return 0.0
-        
+    def _get_update_magnitude(self, update: Dict[str, Any]) -> torch.Tensor:
+        """
+        Helper to calculate the L2-norm for the statistical peer check, as a 0-d tensor.
+        It is the norm of the per-tensor norms, so the update is never concatenated into a copy.
+        """
         # FIX: Filter for torch.Tensor types to ignore metadata.
-        tensor_values = [p for p in update.values() if isinstance(p, torch.Tensor)]
-        if not tensor_values:
-            return 0.0
-            
-        flat_vector = torch.cat([p.view(-1) for p in tensor_values]).float()
-        return torch.linalg.norm(flat_vector).item()
+        norms = [torch.linalg.vector_norm(p if p.is_floating_point() else p.float(), dtype=torch.float32)
+                 for p in update.values() if isinstance(p, torch.Tensor)]
+        if not norms: return torch.zeros((), dtype=torch.float32)
+        return torch.linalg.vector_norm(torch.stack(norms))
 
-    def detect_outliers_in_group(self, updates: Dict[str, Dict[str, Any]]) -> List[str]:
+    def compute_update_magnitudes(self, updates: Dict[str, Dict[str, Any]]) -> Dict[str, float]:
+        """
+        L2-norm of every update in the round. Pure tensor math with no responses triggered,
+        so callers may run it in a worker thread.
+        """
+        if not updates: return {}
+        # One stack and one read-back for the whole round instead of a .item() per client.
+        mag_values = torch.stack([self._get_update_magnitude(update) for update in updates.values()])
+        return dict(zip(updates.keys(), mag_values.tolist()))
+
+    def detect_outliers_in_group(self, updates: Dict[str, Dict[str, Any]], magnitudes: Optional[Dict[str, float]] = None) -> List[str]:
         """
         STAGE 2: Statistical peer check. Detects outliers within a group of updates
         from a single round using Median Absolute Deviation (MAD).
+        `magnitudes` are the updates' precomputed norms, from compute_update_magnitudes.
+        Responses are triggered from here, so it must run on the event loop.
 
         Returns a list of client IDs that are outliers.
         """
@@ -97,12 +108,8 @@ class ADRMEngine:
             gen_logger.info("Cross-client check skipped: Not enough updates for comparison.")
             return []
 
-        magnitudes = {
-            client_id: self._get_update_magnitude(update)
-            for client_id, update in updates.items()
-        }
-        
-        mag_values = np.array(list(magnitudes.values()))
+        if magnitudes is None: magnitudes = self.compute_update_magnitudes(updates)
+        mag_values = np.array(list(magnitudes.values()), dtype=np.float64)
         median = np.median(mag_values)
         mad = np.median(np.abs(mag_values - median))
 
@@ -2,21 +2,42 @@ import logging
 import time
 import asyncio
 import json
-import random
 import os
+import shutil
 import datetime
-from typing import Dict, List, Any, Set, Optional
+import orjson
+import msgpack
+import numpy as np
+from collections import deque
+from typing import Callable, Dict, List, Any, Set, Optional
 
 from log_manager.log_manager import ContextAdapter
 from adrm.response_system import ResponseSystem
 
 # File paths for persistent storage
-CLIENT_DATA_FILE = "database/client_data.json"
-TEMP_CLIENT_DATA_FILE = "database/client_data.json.tmp"
+CLIENT_DATA_FILE = "database/client_data.msgpack"
+TEMP_CLIENT_DATA_FILE = "database/client_data.msgpack.tmp"
+# Pre-msgpack JSON snapshot, migrated on first load
+LEGACY_CLIENT_DATA_FILE = "database/client_data.json"
+# Append-only log of per-client mutations applied on top of the last snapshot
+CLIENT_WAL_FILE = "database/client_data.wal"
+# WAL segment being folded into a snapshot that is still being written
+ROTATED_CLIENT_WAL_FILE = "database/client_data.wal.1"
+# Per-client history is kept bounded so memory and snapshot size don't grow with uptime
+REPUTATION_HISTORY_MAXLEN = 128
+PARTICIPATION_HISTORY_MAXLEN = 256
 
 
 class ClientInfo:
     """Holds information about an individual client."""
+    _FIELDS = (
+        "client_id", "ip_address", "client_type", "status", "last_heartbeat", "uptime_start_time",
+        "reputation", "last_successful_round", "reputation_history", "latency",
+        "last_round_participated", "participation_history"
+    )
+    # last_seen is the monotonic clock reading of the last heartbeat; it drives timeouts and is not persisted.
+    __slots__ = _FIELDS + ("last_seen",)
+
     def __init__(
         self,
         client_id: str,
@@ -38,16 +59,19 @@ class ClientInfo:
         self.status = status
         current_time = int(time.time())
         self.last_heartbeat = last_heartbeat if last_heartbeat is not None else current_time
+        self.last_seen = time.monotonic() - (current_time - self.last_heartbeat)
         self.uptime_start_time = uptime_start_time if uptime_start_time is not None else current_time
         self.reputation = reputation
         self.last_successful_round = last_successful_round
-        self.reputation_history = reputation_history if reputation_history is not None else [100]
+        self.reputation_history = deque(reputation_history if reputation_history is not None else [100], maxlen=REPUTATION_HISTORY_MAXLEN)
         self.latency = latency
         self.last_round_participated = last_round_participated
-        self.participation_history = participation_history if participation_history is not None else []
+        self.participation_history = deque(participation_history or [], maxlen=PARTICIPATION_HISTORY_MAXLEN)
 
     def to_dict(self) -> Dict[str, Any]:
-        return self.__dict__
+        data = {field: getattr(self, field) for field in self._FIELDS}
+        data["reputation_history"] = list(self.reputation_history); data["participation_history"] = list(self.participation_history)
+        return data
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "ClientInfo":
@@ -59,7 +83,7 @@ class ClientInfo:
             latency=data.get('latency', 0.0)
         )
         instance.last_round_participated = data.get('last_round_participated', 0)
-        instance.participation_history = data.get('participation_history', [])
+        instance.participation_history = deque(data.get('participation_history', []), maxlen=PARTICIPATION_HISTORY_MAXLEN)
         return instance
 
     def __repr__(self):
@@ -81,11 +105,27 @@ class ClientManager:
         self.grace_period_timeout = self.cfg.get("grace_period_timeout", 300)
         self.status_check_interval_seconds = self.cfg.get("status_check_interval_seconds", 1)
         self.status_check_task = None
-        self.clients_in_current_round: List[str] = []
+        self.save_interval_ms = self.cfg.get("save_interval_ms", 500)
+        self.flush_task = None
+        self._dirty = asyncio.Event()
+        # Optional hook fired on every persisted change (registration, status, participation), e.g. to wake the round check.
+        self.on_clients_changed: Optional[Callable[[], None]] = None
+        self.clients_in_current_round: Set[str] = set()
         self.clients_notified_for_round: Set[str] = set()
+        # Maintained on every status transition so connected-client queries don't scan the fleet.
+        self._connected_ids: Set[str] = set()
         self._lock = asyncio.Lock()
+        self._round_lock = asyncio.Lock()
+        self.checkpoint_interval_seconds = self.cfg.get("checkpoint_interval_seconds", 60)
+        self.checkpoint_max_deltas = self.cfg.get("checkpoint_max_deltas", 1000)
+        self._dirty_count = 0
+        self._last_checkpoint = time.time()
+        self._wal = None
+        self._checkpoint_in_progress = False
+        # The snapshot write running in a worker thread, which outlives a cancelled _checkpoint.
+        self._snapshot_write: Optional[asyncio.Future] = None
         self._load_clients()
-        self.logger.info(f"ClientManager initialized. Loaded {len(self.connected_clients)} clients.")
+        self.logger.info("ClientManager initialized. Loaded %s clients.", len(self.connected_clients))
 
     # NEW: Setter method to resolve the circular dependency
     def set_response_system(self, response_system: ResponseSystem):
@@ -94,82 +134,244 @@ class ClientManager:
         self.logger.info("ResponseSystem dependency injected into ClientManager.")
 
     def _load_clients(self):
+        migrated = False
         try:
             os.makedirs(os.path.dirname(CLIENT_DATA_FILE), exist_ok=True)
             if os.path.exists(CLIENT_DATA_FILE):
-                with open(CLIENT_DATA_FILE, "r") as f:
-                    data = json.load(f)
+                with open(CLIENT_DATA_FILE, "rb") as f:
+                    data = msgpack.unpackb(f.read(), raw=False)
                     self.connected_clients = {
                         client_id: ClientInfo.from_dict(info) for client_id, info in data.items()
                     }
-                for c in self.connected_clients.values():
-                    c.status = "connected"; c.uptime_start_time = int(time.time())
-                self.logger.info(f"Loaded {len(self.connected_clients)} clients from {CLIENT_DATA_FILE}.")
+                self.logger.info("Loaded %s clients from %s.", len(self.connected_clients), CLIENT_DATA_FILE)
+            elif os.path.exists(LEGACY_CLIENT_DATA_FILE):
+                with open(LEGACY_CLIENT_DATA_FILE, "rb") as f:
+                    data = orjson.loads(f.read())
+                    self.connected_clients = {
+                        client_id: ClientInfo.from_dict(info) for client_id, info in data.items()
+                    }
+                migrated = True
+                self.logger.info("Loaded %s clients from %s; migrating to %s.", len(self.connected_clients), LEGACY_CLIENT_DATA_FILE, CLIENT_DATA_FILE)
             else:
                 self.logger.info("No existing client data file found.")
-        except (IOError, json.JSONDecodeError, TypeError) as e:
-            self.logger.error(f"Failed to load client data: {e}. Starting fresh.", exc_info=True)
+        except (IOError, ValueError, TypeError) as e:
+            self.logger.error("Failed to load client data: %s. Starting fresh.", e, exc_info=True)
             self.connected_clients = {}
+        replayed = self._replay_wal(ROTATED_CLIENT_WAL_FILE) + self._replay_wal(CLIENT_WAL_FILE)
+        now, mono = int(time.time()), time.monotonic()
+        for c in self.connected_clients.values():
+            c.status = "connected"; c.uptime_start_time = now; c.last_seen = mono - (now - c.last_heartbeat)
+        self._connected_ids = set(self.connected_clients)
+        self._wal = open(CLIENT_WAL_FILE, "a", buffering=1 << 16)
+        if (replayed or migrated) and self._write_snapshot(self._snapshot_nolock()):
+            if migrated: os.remove(LEGACY_CLIENT_DATA_FILE)
+            self._discard_rotated_wal()
+            try: self._wal.truncate(0)
+            except IOError as e: self.logger.error("Failed to truncate client WAL: %s", e)
+            self._dirty_count = 0
+
+    def _replay_wal(self, path: str) -> int:
+        """Applies the deltas logged since the last snapshot. Returns the number of records replayed."""
+        if not os.path.exists(path): return 0
+        replayed = 0
+        try:
+            with open(path, "r") as f:
+                for line in f:
+                    try: record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn trailing line from a crash mid-write; the records before it are intact.
+                        self.logger.warning("Skipping malformed record in %s.", path)
+                        continue
+                    self._apply_delta(record); replayed += 1
+        except (IOError, KeyError, TypeError) as e:
+            self.logger.error("Failed to replay client WAL: %s", e, exc_info=True)
+        if replayed: self.logger.info("Replayed %s records from %s.", replayed, path)
+        return replayed
+
+    def _apply_delta(self, record: Dict[str, Any]):
+        op, client_id = record["op"], record["cid"]
+        if op == "deregister":
+            self.connected_clients.pop(client_id, None); return
+        client_info = self.connected_clients.get(client_id)
+        if op == "add":
+            if client_info:
+                client_info.ip_address = record["ip_address"]; client_info.client_type = record["client_type"]
+                client_info.last_heartbeat = record["ts"]
+            else:
+                self.connected_clients[client_id] = ClientInfo(
+                    client_id, record["ip_address"], record["client_type"],
+                    last_heartbeat=record["ts"], uptime_start_time=record["ts"]
+                )
+            return
+        if not client_info: return
+        if op == "heartbeat":
+            client_info.status = "connected"; client_info.last_heartbeat = record["ts"]; client_info.uptime_start_time = record["ts"]
+        elif op == "status":
+            client_info.status = record["status"]
+        elif op == "penalize":
+            client_info.reputation = record["reputation"]; client_info.reputation_history.append(record["reputation"])
+        elif op == "participation":
+            client_info.last_round_participated = record["round"]; client_info.participation_history.append(record["record"])
 
-    def _save_clients_nolock(self):
+    def _log_delta(self, op: str, client_id: str, **fields: Any):
+        """Appends one mutation record to the WAL; the full snapshot is only rewritten on checkpoint."""
         try:
-            with open(TEMP_CLIENT_DATA_FILE, "w") as f:
-                json.dump({cid: info.to_dict() for cid, info in self.connected_clients.items()}, f, indent=4)
+            self._wal.write(json.dumps({"op": op, "cid": client_id, **fields}) + "\n")
+            self._dirty_count += 1; self._dirty.set()
+        except (IOError, ValueError) as e:
+            self.logger.error("Failed to append to client WAL: %s", e)
+        if self.on_clients_changed: self.on_clients_changed()
+
+    def _snapshot_nolock(self) -> bytes:
+        """Serializes the client table; must be called under the lock so the blob is consistent."""
+        return msgpack.packb({cid: info.to_dict() for cid, info in self.connected_clients.items()}, use_bin_type=True)
+
+    def _write_snapshot(self, blob: bytes) -> bool:
+        """Blocking file IO only, safe to run in a worker thread. Writes the blob straight to the fd,
+        skipping the buffered file object since the whole payload is already in memory. The data and the
+        rename are fsynced before returning, as the caller then discards the WAL segment it supersedes."""
+        try:
+            fd = os.open(TEMP_CLIENT_DATA_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                view = memoryview(blob)
+                while view: view = view[os.write(fd, view):]
+                os.fsync(fd)
+            finally:
+                os.close(fd)
             os.replace(TEMP_CLIENT_DATA_FILE, CLIENT_DATA_FILE)
-            self.logger.debug(f"Client data saved to {CLIENT_DATA_FILE}.")
+            if hasattr(os, "O_DIRECTORY"):
+                dir_fd = os.open(os.path.dirname(CLIENT_DATA_FILE), os.O_RDONLY | os.O_DIRECTORY)
+                try: os.fsync(dir_fd)
+                finally: os.close(dir_fd)
+            self.logger.debug("Client data saved to %s.", CLIENT_DATA_FILE)
+            return True
+        except IOError as e:
+            self.logger.error("Failed to save client data: %s", e)
+            return False
+
+    def _rotate_wal_nolock(self):
+        """Moves the current WAL aside so deltas logged while the snapshot is written land in a fresh segment."""
+        try:
+            self._wal.close()
+            if os.path.exists(ROTATED_CLIENT_WAL_FILE):
+                # The previous snapshot write failed; keep its deltas until one succeeds.
+                with open(CLIENT_WAL_FILE, "rb") as src, open(ROTATED_CLIENT_WAL_FILE, "ab") as dst:
+                    shutil.copyfileobj(src, dst, 1 << 16)
+                os.remove(CLIENT_WAL_FILE)
+            elif os.path.exists(CLIENT_WAL_FILE):
+                os.replace(CLIENT_WAL_FILE, ROTATED_CLIENT_WAL_FILE)
+        except IOError as e:
+            self.logger.error("Failed to rotate client WAL: %s", e)
+        self._wal = open(CLIENT_WAL_FILE, "a", buffering=1 << 16)
+
+    def _discard_rotated_wal(self):
+        try:
+            if os.path.exists(ROTATED_CLIENT_WAL_FILE): os.remove(ROTATED_CLIENT_WAL_FILE)
         except IOError as e:
-            self.logger.error(f"Failed to save client data: {e}")
+            self.logger.error("Failed to remove rotated client WAL: %s", e)
+
+    async def _checkpoint(self):
+        """Captures a snapshot under the lock, then writes it off the event loop. Single-flight: a checkpoint
+        requested while one is being written is skipped, its deltas stay in the WAL for the next one."""
+        if self._checkpoint_in_progress: return
+        self._checkpoint_in_progress = True
+        try:
+            # Cancelling a checkpoint does not stop its thread; never start a second write on the same temp file.
+            if self._snapshot_write is not None and not self._snapshot_write.done(): await asyncio.wait([self._snapshot_write])
+            async with self._lock:
+                blob = self._snapshot_nolock()
+                self._rotate_wal_nolock()
+                self._dirty_count = 0; self._last_checkpoint = time.time()
+            self._snapshot_write = asyncio.ensure_future(asyncio.to_thread(self._write_snapshot, blob))
+            if await asyncio.shield(self._snapshot_write): self._discard_rotated_wal()
+        finally:
+            self._checkpoint_in_progress = False
+
+    def _checkpoint_due(self, now: float) -> bool:
+        if not self._dirty_count: return False
+        return self._dirty_count >= self.checkpoint_max_deltas or now - self._last_checkpoint >= self.checkpoint_interval_seconds
 
     async def add_or_update_client(self, client_id: str, ip_address: str, client_type: str) -> None:
         async with self._lock:
             client_info = self.connected_clients.get(client_id)
             if client_info:
                 client_info.ip_address = ip_address; client_info.client_type = client_type
-                client_info.status = "connected"; client_info.last_heartbeat = int(time.time())
-                self.logger.debug(f"Updated client info for {client_id}.")
+                client_info.status = "connected"; client_info.last_heartbeat = int(time.time()); client_info.last_seen = time.monotonic()
+                self._connected_ids.add(client_id)
+                self.logger.debug("Updated client info for %s.", client_id)
             else:
-                self.connected_clients[client_id] = ClientInfo(client_id, ip_address, client_type)
-                self.logger.info(f"New client {client_id} added.")
-            self._save_clients_nolock()
+                client_info = self.connected_clients[client_id] = ClientInfo(client_id, ip_address, client_type)
+                self._connected_ids.add(client_id)
+                self.logger.info("New client %s added.", client_id)
+            self._log_delta("add", client_id, ip_address=ip_address, client_type=client_type, ts=client_info.last_heartbeat)
 
     async def update_client_heartbeat(self, client_id: str) -> bool:
         async with self._lock:
             client_info = self.connected_clients.get(client_id)
             if not client_info: return False
-            client_info.last_heartbeat = int(time.time())
+            now = int(time.time())
+            client_info.last_heartbeat = now; client_info.last_seen = time.monotonic()
             if client_info.status == "disconnected":
-                client_info.status = "connected"; client_info.uptime_start_time = int(time.time())
-                self.logger.info(f"Client {client_id} reconnected (heartbeat).")
-                self._save_clients_nolock()
+                client_info.status = "connected"; client_info.uptime_start_time = now
+                self._connected_ids.add(client_id)
+                self.logger.info("Client %s reconnected (heartbeat).", client_id)
+                self._log_delta("heartbeat", client_id, ts=client_info.last_heartbeat)
             return True
 
     async def deregister_client(self, client_id: str):
-        async with self._lock:
-            if client_id in self.connected_clients:
-                del self.connected_clients[client_id]
-                self.logger.info(f"Client {client_id} deregistered. Remaining: {len(self.connected_clients)}")
-                self._save_clients_nolock()
+        async with self._lock: self._deregister_nolock(client_id)
+
+    def _deregister_nolock(self, client_id: str):
+        if self.connected_clients.pop(client_id, None) is None: return
+        self._connected_ids.discard(client_id)
+        self.logger.info("Client %s deregistered. Remaining: %s", client_id, len(self.connected_clients))
+        self._log_delta("deregister", client_id)
 
     async def _periodic_status_check(self):
         while True:
             await asyncio.sleep(self.status_check_interval_seconds)
-            now = int(time.time()); clients_to_deregister = []; needs_save = False
+            # Phase 1: copy the fields the scan needs while holding the lock for O(N) reference copies only.
+            async with self._lock:
+                snapshot = [(cid, c.status, c.last_seen) for cid, c in self.connected_clients.items()]
+            # Phase 2: find timeout candidates without blocking heartbeats.
+            # Monotonic time, read once per tick, so a wall-clock jump can't mass-disconnect the fleet.
+            now = time.monotonic(); to_disconnect = []; to_deregister = []
+            for client_id, status, last_seen in snapshot:
+                delta = now - last_seen
+                if status == "connected" and delta > self.heartbeat_timeout_seconds: to_disconnect.append(client_id)
+                elif status == "disconnected" and delta > self.grace_period_timeout: to_deregister.append(client_id)
+            if not to_disconnect and not to_deregister: continue
+            # Phase 3: re-check each candidate, since a heartbeat may have arrived in between, and apply.
             async with self._lock:
-                for client_id, client_info in self.connected_clients.items():
-                    delta = now - client_info.last_heartbeat
-                    if client_info.status == "connected" and delta > self.heartbeat_timeout_seconds:
+                for client_id in to_disconnect:
+                    client_info = self.connected_clients.get(client_id)
+                    if client_info and client_info.status == "connected" and now - client_info.last_seen > self.heartbeat_timeout_seconds:
                         client_info.status = "disconnected"
-                        self.logger.warning(f"Client {client_id} timed out -> disconnected."); needs_save = True
-                    elif client_info.status == "disconnected" and delta > self.grace_period_timeout:
-                        self.logger.warning(f"Client {client_id} exceeded grace period -> will be deregistered.")
-                        clients_to_deregister.append(client_id)
-                if needs_save: self._save_clients_nolock()
-            for client_id in clients_to_deregister: await self.deregister_client(client_id)
+                        self._connected_ids.discard(client_id)
+                        self.logger.warning("Client %s timed out -> disconnected.", client_id)
+                        self._log_delta("status", client_id, status="disconnected")
+                for client_id in to_deregister:
+                    client_info = self.connected_clients.get(client_id)
+                    if client_info and client_info.status == "disconnected" and now - client_info.last_seen > self.grace_period_timeout:
+                        self.logger.warning("Client %s exceeded grace period -> deregistering.", client_id)
+                        self._deregister_nolock(client_id)
+
+    async def _flush_loop(self):
+        """Single writer for the WAL: batches every mutation logged within save_interval_ms into one flush."""
+        while True:
+            await self._dirty.wait()
+            await asyncio.sleep(self.save_interval_ms / 1000)
+            self._dirty.clear()
+            # WAL appends never span an await, so the buffer is always whole records and needs no lock here.
+            if self._checkpoint_due(time.time()): await self._checkpoint()
+            else: self._wal.flush()
 
     async def start_status_checker(self):
         if not self.status_check_task or self.status_check_task.done():
             self.status_check_task = asyncio.create_task(self._periodic_status_check())
             self.logger.info("Status checker started.")
+        if not self.flush_task or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self._flush_loop())
 
     async def stop_status_checker(self):
         if self.status_check_task:
@@ -177,14 +379,35 @@ class ClientManager:
             try: await self.status_check_task
             except asyncio.CancelledError: self.logger.info("Status checker stopped.")
             self.status_check_task = None
-        async with self._lock: self._save_clients_nolock()
+        if self.flush_task:
+            self.flush_task.cancel()
+            try: await self.flush_task
+            except asyncio.CancelledError: pass
+            self.flush_task = None
+        await self._checkpoint()
+        self._wal.flush()
 
-    def _calculate_client_score(self, c: ClientInfo) -> float:
-        rep_w, up_w, lat_w = 0.6, 0.3, 0.1; norm_rep = c.reputation / 100.0
-        norm_up = min(1.0, (int(time.time()) - c.uptime_start_time) / 3600.0)
-        norm_lat = 1.0 - (min(c.latency, 500) / 500.0)
+    def _calculate_client_scores(self, clients: List[ClientInfo], now: int) -> np.ndarray:
+        """Scores in [0, 1] for each client, computed as array ops over the gathered fields."""
+        n = len(clients); rep_w, up_w, lat_w = 0.6, 0.3, 0.1
+        norm_rep = np.fromiter((c.reputation for c in clients), dtype=np.float64, count=n) / 100.0
+        norm_up = np.minimum(1.0, (now - np.fromiter((c.uptime_start_time for c in clients), dtype=np.float64, count=n)) / 3600.0)
+        norm_lat = 1.0 - np.minimum(np.fromiter((c.latency for c in clients), dtype=np.float64, count=n), 500) / 500.0
         return rep_w * norm_rep + up_w * norm_up + lat_w * norm_lat
 
+    def _rank_clients(self, clients: List[ClientInfo], k: int) -> List[str]:
+        """Top k by (least recently participated, highest score), ties going to the client listed first.
+        A partition finds the k-th key, so only the clients at or below it are sorted."""
+        if k <= 0: return []
+        scores = self._calculate_client_scores(clients, int(time.time()))
+        # Rounds are integers and scores lie in [0, 1], so halving the score keeps round order dominant.
+        key = np.fromiter((c.last_round_participated for c in clients), dtype=np.float64, count=len(clients)) - scores / 2
+        if k >= len(clients): candidates = np.arange(len(clients))
+        # Every client tied with the k-th key is kept, so the cut is decided by position, not partition order.
+        else: candidates = np.flatnonzero(key <= np.partition(key, k - 1)[k - 1])
+        idx = candidates[np.lexsort((candidates, key[candidates]))][:k]
+        return [clients[i].client_id for i in idx]
+
     async def get_eligible_clients_count(self) -> int:
         # Add a strict check at the beginning of the function.
         if not self.response_system:
@@ -193,55 +416,64 @@ class ClientManager:
 
         count = 0
         async with self._lock:
-            for cid, client in self.connected_clients.items():
-                # Now that we know self.response_system exists, this check is safe.
-                is_blocked = self.response_system.is_client_blocked(cid)
-                if client.status == "connected" and client.reputation > 20 and not is_blocked:
+            blocked_ids = self._blocked_ids()
+            for cid in self._connected_ids:
+                if cid not in blocked_ids and self.connected_clients[cid].reputation > 20:
                     count += 1
         return count
-    
+
+    def _blocked_ids(self) -> Set[str]:
+        """Currently blocked clients, resolved once per scan. Goes through is_client_blocked so expired
+        blocks are still lifted, but only for the (small) blocked table rather than every connected client."""
+        return {cid for cid in list(self.response_system.blocked_clients) if self.response_system.is_client_blocked(cid)}
+
     async def select_clients_for_round(self, clients_per_round: int) -> List[str]:
         selected = []
-        async with self._lock:
+        async with self._lock, self._round_lock:
             # UPDATED: Added a check to ensure response_system is set before filtering
             if not self.response_system:
                 self.logger.warning("Response system not set in ClientManager; cannot check for blocked clients.")
                 return []
             
-            connected_ids = [cid for cid, c in self.connected_clients.items() if c.status == "connected"]
+            blocked_ids = self._blocked_ids()
+            # Walked in registration order rather than over the id set, whose order changes between processes.
             eligible_clients = [
-                self.connected_clients[cid] for cid in connected_ids
-                if self.connected_clients[cid].reputation > 50 and not self.response_system.is_client_blocked(cid)
+                c for cid, c in self.connected_clients.items()
+                if cid in self._connected_ids and cid not in blocked_ids and c.reputation > 50
             ]
             if len(eligible_clients) < clients_per_round:
-                self.logger.warning(f"Not enough eligible clients: {len(eligible_clients)} available, {clients_per_round} required.")
+                self.logger.warning("Not enough eligible clients: %s available, %s required.", len(eligible_clients), clients_per_round)
                 return []
-            eligible_clients.sort(key=lambda c: (c.last_round_participated, -self._calculate_client_score(c)))
-            selected_clients_info = eligible_clients[:clients_per_round]
-            selected = [c.client_id for c in selected_clients_info]
-            self.clients_in_current_round = selected
+            selected = self._rank_clients(eligible_clients, clients_per_round)
+            self.clients_in_current_round = set(selected)
             self.clients_notified_for_round = set()
-        self.logger.info(f"Selected {len(selected)} clients for round using fair sorting: {selected}")
+        self.logger.info("Selected %s clients for round using fair sorting: %s", len(selected), selected)
         return selected
 
-    def is_client_connected(self, client_id: str) -> bool: return client_id in self.connected_clients and self.connected_clients[client_id].status == "connected"
-    def get_connected_clients_ids(self) -> List[str]: return [cid for cid, c in self.connected_clients.items() if c.status == "connected"]
+    def is_client_connected(self, client_id: str) -> bool: return client_id in self._connected_ids
+    def get_connected_clients_ids(self) -> List[str]: return list(self._connected_ids)
     def get_total_clients_count(self) -> int: return len(self.connected_clients)
-    def get_connected_clients_count(self) -> int: return len(self.get_connected_clients_ids())
+    def get_connected_clients_count(self) -> int: return len(self._connected_ids)
 
     async def get_client_statuses(self) -> Dict[str, Any]:
         async with self._lock:
-            clients_dict = {}
             # UPDATED: Added a check to ensure response_system is set
             blocked_clients_details = self.response_system.blocked_clients if self.response_system else {}
-            for cid, c in self.connected_clients.items():
-                client_data = c.to_dict()
-                client_data['is_blocked'] = cid in blocked_clients_details
-                client_data['block_details'] = blocked_clients_details.get(cid)
-                clients_dict[cid] = client_data
+            # One dict per client, built directly; the dashboards read every persisted field plus the block state.
+            clients_dict = {
+                cid: {
+                    "client_id": cid, "ip_address": c.ip_address, "client_type": c.client_type, "status": c.status,
+                    "last_heartbeat": c.last_heartbeat, "uptime_start_time": c.uptime_start_time, "reputation": c.reputation,
+                    "last_successful_round": c.last_successful_round, "reputation_history": list(c.reputation_history),
+                    "latency": c.latency, "last_round_participated": c.last_round_participated,
+                    "participation_history": list(c.participation_history),
+                    "is_blocked": cid in blocked_clients_details, "block_details": blocked_clients_details.get(cid),
+                }
+                for cid, c in self.connected_clients.items()
+            }
             return {
                 "total_clients": self.get_total_clients_count(), "connected_clients": self.get_connected_clients_count(),
-                "disconnected_clients": sum(1 for c in self.connected_clients.values() if c.status == "disconnected"),
+                "disconnected_clients": len(self.connected_clients) - len(self._connected_ids),
                 "clients": clients_dict,
             }
 
@@ -250,27 +482,28 @@ class ClientManager:
 
     async def penalize_client(self, client_id: str, penalty: int = 10):
         async with self._lock:
-            if client_id in self.connected_clients:
-                c = self.connected_clients[client_id]; c.reputation = max(0, c.reputation - penalty)
-                c.reputation_history.append(c.reputation)
-                self.logger.warning(f"Client {client_id} penalized -> reputation {c.reputation}")
-                self._save_clients_nolock()
+            c = self.connected_clients.get(client_id)
+            if c is None: return
+            c.reputation = max(0, c.reputation - penalty); c.reputation_history.append(c.reputation)
+            self.logger.warning("Client %s penalized -> reputation %s", client_id, c.reputation)
+            self._log_delta("penalize", client_id, reputation=c.reputation)
 
-    async def record_round_participation(self, client_id: str, round_number: int, global_metrics: Dict[str, Any]):
+    async def record_round_participation(self, client_id: str, round_number: int, global_metrics: Dict[str, Any], timestamp: Optional[str] = None):
+        """Callers recording a whole round should format the timestamp once and pass it to every client."""
         async with self._lock:
             client_info = self.connected_clients.get(client_id)
             if not client_info: return
             client_info.last_round_participated = round_number
-            participation_record = {"round": round_number, "timestamp": datetime.datetime.now().isoformat(), "global_accuracy": global_metrics.get("accuracy"), "global_loss": global_metrics.get("loss")}
+            participation_record = {"round": round_number, "timestamp": timestamp or datetime.datetime.now().isoformat(), "global_accuracy": global_metrics.get("accuracy"), "global_loss": global_metrics.get("loss")}
             client_info.participation_history.append(participation_record)
-            self.logger.info(f"Recorded participation for client {client_id} in round {round_number}.")
-            self._save_clients_nolock()
+            self.logger.debug("Recorded participation for client %s in round %s.", client_id, round_number)
+            self._log_delta("participation", client_id, round=round_number, record=participation_record)
 
     async def reset_round_clients(self):
-        async with self._lock: self.clients_in_current_round = []; self.clients_notified_for_round = set()
+        async with self._round_lock: self.clients_in_current_round = set(); self.clients_notified_for_round = set()
 
     async def is_client_selected_and_unnotified(self, client_id: str) -> bool:
-        async with self._lock:
+        async with self._round_lock:
             if client_id in self.clients_in_current_round and client_id not in self.clients_notified_for_round:
                 self.clients_notified_for_round.add(client_id); return True
         return False
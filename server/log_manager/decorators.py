@@ -9,13 +9,16 @@ def handle_exceptions(log_message: str):
     A decorator to gracefully handle and log exceptions from a function.
     """
     def decorator(func: Callable[..., Any]):
+        # Resolved once per decorated function rather than on every exception.
+        logger = logging.getLogger(func.__module__)
+
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs):
             try:
                 return await func(*args, **kwargs)
             except Exception as e:
-                logger = logging.getLogger(func.__module__)
-                logger.error(f"{log_message}: {e}", exc_info=True)
+                # Tracebacks are only captured when DEBUG output would actually show them.
+                logger.error("%s: %s", log_message, e, exc_info=logger.isEnabledFor(logging.DEBUG))
                 # You can choose to return a default value or re-raise here.
                 # For a server, it's often best to let the error propagate
                 # to a higher-level handler that can shut down gracefully.
@@ -26,8 +29,7 @@ def handle_exceptions(log_message: str):
             try:
                 return func(*args, **kwargs)
             except Exception as e:
-                logger = logging.getLogger(func.__module__)
-                logger.error(f"{log_message}: {e}", exc_info=True)
+                logger.error("%s: %s", log_message, e, exc_info=logger.isEnabledFor(logging.DEBUG))
                 return None
 
         # Check if the function is a coroutine and return the appropriate wrapper
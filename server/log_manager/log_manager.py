@@ -1,9 +1,10 @@
 # utils/log_manager.py
 
+import atexit
 import logging
 import os
 from pythonjsonlogger.json import JsonFormatter
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import MemoryHandler, TimedRotatingFileHandler
 
 # --- FIX START: Define a robust, absolute path for the log directory ---
 # Get the directory where the main server script is likely located.
@@ -12,6 +13,22 @@ _project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 LOG_DIR = os.path.join(_project_root, "server", "logs")
 # --- FIX END ---
 
+# JSON file records are buffered and written in batches. Warnings and errors, a full buffer, or a
+# buffer whose oldest record has waited JSON_LOG_FLUSH_INTERVAL_SECONDS flush immediately, so a crash
+# loses at most a few seconds of INFO lines and none of the warnings leading up to it.
+JSON_LOG_BUFFER_CAPACITY = 1024
+JSON_LOG_FLUSH_INTERVAL_SECONDS = 5.0
+_buffered_handlers = []
+
+class TimedMemoryHandler(MemoryHandler):
+    """MemoryHandler that also flushes once its oldest buffered record is `flush_interval` seconds old."""
+    def __init__(self, capacity, flush_interval, **kwargs):
+        super().__init__(capacity, **kwargs)
+        self.flush_interval = flush_interval
+
+    def shouldFlush(self, record):
+        return super().shouldFlush(record) or record.created - self.buffer[0].created >= self.flush_interval
+
 class ContextAdapter(logging.LoggerAdapter):
     def process(self, msg, kwargs):
         if 'extra' not in kwargs:
@@ -59,12 +76,16 @@ def add_json_file_handler(logger_name: str, log_file_name: str):
     
     file_handler.setLevel(logger.level)
 
-    logger.addHandler(file_handler)
+    memory_handler = TimedMemoryHandler(JSON_LOG_BUFFER_CAPACITY, JSON_LOG_FLUSH_INTERVAL_SECONDS, flushLevel=logging.WARNING, target=file_handler)
+    memory_handler.setLevel(logger.level)
+    _buffered_handlers.append(memory_handler)
+
+    logger.addHandler(memory_handler)
     logger.propagate = True
 
-    class PeriodicFlushFilter(logging.Filter):
-        def filter(self, record):
-            if (record.levelname in ['CRITICAL', 'ERROR', 'WARNING', 'INFO'] and 
-                (record.name == 'root' or record.name.startswith('ServerControlPlaneManager'))):
-                file_handler.flush()
-            return True
\ No newline at end of file
+def flush_json_file_handlers():
+    """Writes any buffered JSON log records through to their files."""
+    for handler in _buffered_handlers:
+        handler.flush()
+
+atexit.register(flush_json_file_handlers)
\ No newline at end of file
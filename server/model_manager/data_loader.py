@@ -36,11 +36,10 @@ def load_wustl_iiot_test_data(file_path: str = './data/WUSTL_IIoT_2021.csv'):
         return None, 41, 2 # Return None for loader on failure
 
     logger.info(f"Loading and preprocessing data from {file_path}...")
-    df = pd.read_csv(file_path)
-    
     # --- Preprocessing Step 1: Drop non-generalizable columns ---
-    columns_to_drop = ['StartTime', 'LastTime', 'SrcAddr', 'DstAddr', 'sIpId', 'dIpId']
-    df = df.drop(columns=columns_to_drop, errors='ignore')
+    # Skipped at parse time, so the timestamp and address strings are never materialised.
+    columns_to_drop = {'StartTime', 'LastTime', 'SrcAddr', 'DstAddr', 'sIpId', 'dIpId'}
+    df = pd.read_csv(file_path, usecols=lambda column: column not in columns_to_drop)
     
     # --- Feature and Label Separation ---
     # Assuming the label column is the last one
@@ -1,10 +1,18 @@
 import os
+import copy
+import atexit
 import logging
+import queue
+import threading
+import time
 import torch
 import torch.nn as nn
 from typing import Dict, Any, List, Optional
 import datetime
-import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+import pickle
 
 # Import the new, secure aggregation function and the modular model and data loader
 from sam.sam import aggregate_model_weights_securely
@@ -35,6 +43,35 @@ class ModelManager:
         # Now, load_model() can access self.input_size and self.num_classes
         self.global_model = self.load_model()
         self.global_model_version = 0
+        # The architecture is fixed once loaded, so the key set is computed once.
+        self.global_model_keys = frozenset(self.global_model.state_dict().keys())
+        # Detached CPU state dict of the current version, rebuilt only after update_global_model.
+        self._cpu_state_cache: Optional[Dict[str, Any]] = None
+
+        # Evaluation runs on the GPU when there is one, on a copy of the global model so that
+        # the aggregation path keeps working with CPU tensors.
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.eval_model = copy.deepcopy(self.global_model).to(self.device) if self.device.type == "cuda" else self.global_model
+        # The GPU copy is updated in place, so a CUDA graph of the whole evaluation pass over the
+        # resident test set, captured on first use, stays valid across rounds. torch.compile is the
+        # alternative when graphs are disabled. The global model itself is never compiled: that
+        # would prefix its state_dict keys with `_orig_mod.`.
+        self.eval_cuda_graph = self.device.type == "cuda" and self.cfg.get("eval_cuda_graph", True)
+        self._eval_graph = None
+        self.eval_forward = self.eval_model
+        if self.device.type == "cuda" and not self.eval_cuda_graph and self.cfg.get("compile_eval_model", True):
+            self.eval_forward = torch.compile(self.eval_model, mode="reduce-overhead", fullgraph=True)
+        self._criterion = nn.CrossEntropyLoss().to(self.device)
+
+        # The test set is small enough to stay resident on the evaluation device; each round
+        # slices batches out of it instead of re-collating and re-copying them through the loader.
+        self._test_features: Optional[torch.Tensor] = None
+        self._test_labels: Optional[torch.Tensor] = None
+        self.test_batch_size = self.cfg.get("eval_batch_size", 512)
+        if self.cifar10_test_loader is not None:
+            test_dataset = self.cifar10_test_loader.dataset
+            self._test_features = test_dataset.features.to(self.device)
+            self._test_labels = test_dataset.labels.to(self.device)
 
         # New attributes for model convergence checking
         self.best_accuracy = 0.0
@@ -44,11 +81,34 @@ class ModelManager:
 
         # Create the model save directory if it doesn't exist
         os.makedirs(self.model_save_path, exist_ok=True)
+        # Checkpoints are written on a single worker so saves never overlap and never stall a round.
+        self._save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-save")
+        # Saved models are archival snapshots, so floating-point weights are stored at reduced precision.
+        self.checkpoint_dtype_name = self.cfg.get("checkpoint_dtype", "float16")
+        self.checkpoint_dtype = getattr(torch, self.checkpoint_dtype_name)
         
         # --- NEW: Initialize metrics history and load from file ---
-        self.metrics_history: List[Dict[str, Any]] = []
-        self.metrics_log_path = self.cfg.get("metrics_log_path", "./database/logs/model_metrics_history.json")
+        # Only the most recent rounds are kept in memory; the JSON Lines file holds the full history.
+        self.metrics_history: "deque[Dict[str, Any]]" = deque(maxlen=self.cfg.get("metrics_in_memory", 1000))
+        self.metrics_log_path = self.cfg.get("metrics_log_path", "./database/logs/model_metrics_history.jsonl")
+        # Created once here, like the model save directory, rather than checked on every write.
+        metrics_log_dir = os.path.dirname(self.metrics_log_path)
+        if metrics_log_dir:
+            os.makedirs(metrics_log_dir, exist_ok=True)
+        # Append-only descriptor kept open by the writer thread across commits.
+        self._metrics_fd: Optional[int] = None
         self._load_metrics_history() # Load any existing history on startup
+        # New entries are appended to disk by a background writer, off the round's critical path.
+        # It group-commits: one append and fsync per `metrics_commit_batch` entries or per
+        # `metrics_commit_interval_seconds`, whichever comes first. A threading.Event entry forces
+        # a commit and is set once it is done.
+        self.metrics_commit_batch = self.cfg.get("metrics_commit_batch", 16)
+        self.metrics_commit_interval = self.cfg.get("metrics_commit_interval_seconds", 30.0)
+        self.metrics_flush_timeout = self.cfg.get("metrics_flush_timeout_seconds", 10.0)
+        self._metrics_queue: "queue.Queue[Any]" = queue.Queue()
+        self._metrics_writer = threading.Thread(target=self._metrics_writer_loop, name="metrics-writer", daemon=True)
+        self._metrics_writer.start()
+        atexit.register(self.flush_metrics_history)
 
         # FIX: Add attributes for tracking first and last aggregation details
         self.first_aggregated_model_details: Optional[Dict[str, Any]] = None
@@ -56,42 +116,112 @@ class ModelManager:
 
     # --- NEW: Methods to save and load metrics history ---
     def _load_metrics_history(self):
-        """Loads metrics history from a JSON file if it exists."""
+        """Loads metrics history from a JSON Lines file if it exists."""
         if os.path.exists(self.metrics_log_path):
             try:
-                with open(self.metrics_log_path, 'r') as f:
-                    self.metrics_history = json.load(f)
-                self.logger.info(f"Successfully loaded {len(self.metrics_history)} metric records from {self.metrics_log_path}")
-            except (IOError, json.JSONDecodeError) as e:
+                # Startup is the only time a legacy file is rewritten: the writer thread does not exist yet.
+                entries = self._read_metrics_file(migrate=True)
+                self.metrics_history.extend(entries)
+                self.logger.info(f"Successfully loaded {len(self.metrics_history)} of {len(entries)} metric records from {self.metrics_log_path}")
+            except (IOError, orjson.JSONDecodeError) as e:
                 self.logger.error(f"Failed to load metrics history from {self.metrics_log_path}: {e}. Starting with an empty history.")
-                self.metrics_history = []
+                self.metrics_history.clear()
         else:
             self.logger.info("No existing metrics history file found. Starting fresh.")
 
-    def _save_metrics_history(self):
-        """Saves the current metrics history to a JSON file."""
-        try:
-            # Ensure the directory exists before writing
-            log_dir = os.path.dirname(self.metrics_log_path)
-            if log_dir:
-                os.makedirs(log_dir, exist_ok=True)
+    def _read_metrics_file(self, migrate: bool = False) -> List[Dict[str, Any]]:
+        """Reads every entry from the metrics history file; `migrate` rewrites a legacy array file as JSON Lines."""
+        with open(self.metrics_log_path, 'rb') as f:
+            content = f.read()
+        if content.lstrip().startswith(b"["):
+            # A history written as one JSON array by older versions.
+            entries = orjson.loads(content)
+            if migrate: self._write_metrics_lines(entries, 'wb')
+            return entries
+        return [orjson.loads(line) for line in content.splitlines() if line.strip()]
 
-            with open(self.metrics_log_path, 'w') as f:
-                json.dump(self.metrics_history, f, indent=4)
+    def _write_metrics_lines(self, entries: List[Dict[str, Any]], mode: str):
+        """Writes entries to the metrics history file, one compact JSON object per line."""
+        try:
+            payload = b"".join(orjson.dumps(entry) + b"\n" for entry in entries)
+            if mode == 'ab':
+                if self._metrics_fd is None:
+                    self._metrics_fd = os.open(self.metrics_log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                view = memoryview(payload)
+                while view:
+                    view = view[os.write(self._metrics_fd, view):]
+                # Only the data needs to be durable; fdatasync skips the inode timestamp flush where available.
+                getattr(os, "fdatasync", os.fsync)(self._metrics_fd)
+            else:
+                # Full rewrites go through a temporary file so a crash never leaves a truncated history.
+                temp_path = self.metrics_log_path + ".tmp"
+                with open(temp_path, mode) as f:
+                    f.write(payload)
+                os.replace(temp_path, self.metrics_log_path)
+                # The open descriptor still points at the replaced file.
+                if self._metrics_fd is not None:
+                    os.close(self._metrics_fd)
+                    self._metrics_fd = None
             self.logger.debug(f"Metrics history successfully saved to {self.metrics_log_path}")
         except IOError as e:
             self.logger.error(f"Failed to save metrics history to {self.metrics_log_path}: {e}")
+
+    def _metrics_writer_loop(self):
+        """Collects queued entries into group commits and appends each commit to the history file."""
+        while True:
+            entries, flushes, deadline = [], [], None
+            while len(entries) < self.metrics_commit_batch:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    entry = self._metrics_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if isinstance(entry, threading.Event):
+                    flushes.append(entry); break
+                entries.append(entry)
+                if deadline is None: deadline = time.monotonic() + self.metrics_commit_interval
+            try:
+                if entries: self._write_metrics_lines(entries, 'ab')
+            except Exception as e:
+                # The writer must outlive a bad commit, or every later entry and flush would go unserved.
+                self.logger.error(f"Dropped {len(entries)} metrics entries that could not be written: {e}", exc_info=True)
+            finally:
+                for flushed in flushes: flushed.set()
+
+    def flush_metrics_history(self) -> bool:
+        """Commits any pending metrics entries and waits, up to `metrics_flush_timeout_seconds`, until they are on disk."""
+        if not self._metrics_writer.is_alive():
+            self.logger.warning("Metrics writer is not running; pending metrics entries were not flushed.")
+            return False
+        flushed = threading.Event()
+        self._metrics_queue.put(flushed)
+        if flushed.wait(self.metrics_flush_timeout): return True
+        self.logger.warning(f"Metrics flush did not finish within {self.metrics_flush_timeout}s.")
+        return False
+
     # --- END NEW METHODS ---
 
     def get_global_model_state(self) -> Dict[str, Any]:
-        """Returns the current state dictionary of the global model."""
-        return self.global_model.state_dict()
+        """
+        Returns the current state dictionary of the global model as detached CPU tensors.
+        The dict is shared between callers until the model changes and must be treated as read-only.
+        """
+        if self._cpu_state_cache is None:
+            self._cpu_state_cache = {k: v.detach().cpu() for k, v in self.global_model.state_dict().items()}
+        return self._cpu_state_cache
+
+    def get_global_model_keys(self) -> frozenset:
+        """Returns the global model's parameter names without materialising a state dict."""
+        return self.global_model_keys
 
     def update_global_model(self, new_state: Dict[str, Any]):
         """
         Updates the global model with a new state dictionary.
+        The aggregated tensors are freshly allocated and owned by nobody else, so they are
+        adopted as the model's tensors rather than copied into the existing parameters.
         """
-        self.global_model.load_state_dict(new_state)
+        self.global_model.load_state_dict(new_state, assign=True)
+        self._cpu_state_cache = None
         self.global_model_version += 1
         self.logger.info(f"Global model updated to version {self.global_model_version}.")
 
@@ -113,34 +243,38 @@ class ModelManager:
 
     def evaluate_model(self) -> Dict[str, float]:
         """Evaluates the current global model on the CIFAR-10 test set and returns metrics."""
-        self.global_model.eval()
-        correct = 0
-        total = 0
-        loss = 0.0
-        criterion = nn.CrossEntropyLoss()
-        
         # Check if loader is available before evaluation
-        if self.cifar10_test_loader is None:
+        if self._test_features is None:
             self.logger.error("Test data loader is None. Cannot perform evaluation.")
             return {"accuracy": 0.0, "loss": 0.0}
-            
-        with torch.no_grad():
-            for images, labels in self.cifar10_test_loader:
-                outputs = self.global_model(images)
-                loss += criterion(outputs, labels).item()
-                _, predicted = torch.max(outputs.data, 1)
-                total += labels.size(0)
-                correct += (predicted == labels).sum().item()
-
-        accuracy = 100 * correct / total
-        avg_loss = loss / len(self.cifar10_test_loader)
+
+        if self.eval_model is not self.global_model: self.eval_model.load_state_dict(self.global_model.state_dict())
+        self.eval_model.eval()
+        total = self._test_labels.size(0)
+        batch_starts = range(0, total, self.test_batch_size)
+
+        with torch.inference_mode():
+            if self.eval_cuda_graph:
+                if self._eval_graph is None: self._capture_eval_graph(batch_starts)
+                self._eval_graph.replay()
+                loss, correct = self._eval_graph_loss, self._eval_graph_correct
+            else:
+                # Running sums stay on the device; they are read back once after the loop.
+                loss = torch.zeros((), device=self.device)
+                correct = torch.zeros((), dtype=torch.long, device=self.device)
+                self._run_eval_batches(batch_starts, loss, correct)
+
+        # A single device-to-host read for both sums.
+        loss_sum, correct_count = torch.stack([loss, correct.to(loss.dtype)]).tolist()
+        accuracy = 100 * correct_count / total
+        avg_loss = loss_sum / len(batch_starts)
         self.logger.info(f"Global model evaluation: Accuracy = {accuracy:.2f}%, Loss = {avg_loss:.4f}.")
         
         # Check for and save the best model
         if accuracy > self.best_accuracy:
             self.best_accuracy = accuracy
             self.rounds_since_last_improvement = 0
-            self.save_model_state(f"best_model_v{self.global_model_version}_acc{accuracy:.2f}.pt")
+            self.save_model_state(f"best_model_v{self.global_model_version}_acc{accuracy:.2f}_{self.checkpoint_dtype_name}.pt")
             self.logger.info(f"New best model found! Accuracy: {self.best_accuracy:.2f}%.")
         else:
             self.rounds_since_last_improvement += 1
@@ -149,6 +283,41 @@ class ModelManager:
 
         return {"accuracy": accuracy, "loss": avg_loss}
     
+    def _run_eval_batches(self, batch_starts: range, loss: torch.Tensor, correct: torch.Tensor):
+        """Adds the summed batch losses and the correct-prediction count over the test set into `loss` and `correct`."""
+        use_autocast = self.device.type == "cuda"
+        # float16 is only valid for CUDA autocast; the CPU context is disabled but still checks its dtype.
+        autocast_dtype = torch.float16 if use_autocast else torch.bfloat16
+        for start in batch_starts:
+            images = self._test_features[start:start + self.test_batch_size]
+            labels = self._test_labels[start:start + self.test_batch_size]
+            with torch.autocast(device_type=self.device.type, dtype=autocast_dtype, enabled=use_autocast):
+                outputs = self.eval_forward(images)
+                loss += self._criterion(outputs, labels)
+            correct += outputs.argmax(dim=1).eq_(labels).sum()
+
+    def _capture_eval_graph(self, batch_starts: range):
+        """
+        Captures the full evaluation pass as one CUDA graph. The inputs are slices of the resident
+        test set and the weights are updated in place, so every replay sees the current model.
+        """
+        self._eval_graph_loss = torch.zeros((), device=self.device)
+        self._eval_graph_correct = torch.zeros((), dtype=torch.long, device=self.device)
+        # Warm up on a side stream so lazy cuBLAS/cuDNN initialisation stays out of the capture.
+        side_stream = torch.cuda.Stream()
+        side_stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(side_stream):
+            self._run_eval_batches(batch_starts, self._eval_graph_loss, self._eval_graph_correct)
+        torch.cuda.current_stream().wait_stream(side_stream)
+
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(graph):
+            self._eval_graph_loss.zero_()
+            self._eval_graph_correct.zero_()
+            self._run_eval_batches(batch_starts, self._eval_graph_loss, self._eval_graph_correct)
+        self._eval_graph = graph
+        self.logger.info(f"Captured evaluation CUDA graph over {len(batch_starts)} batches.")
+
     def has_model_converged(self) -> bool:
         """
         Checks if the model has converged by monitoring accuracy on the test set.
@@ -162,10 +331,21 @@ class ModelManager:
     def save_model_state(self, filename: str):
         """
         Saves the current state dictionary of the global model to a file.
+        The weights are snapshotted here, floating-point tensors cast to the checkpoint dtype,
+        and written to disk in the background.
         """
         file_path = os.path.join(self.model_save_path, filename)
+        snapshot = {
+            k: v.detach().to(self.checkpoint_dtype, copy=True) if v.is_floating_point() else v.detach().clone()
+            for k, v in self.global_model.state_dict().items()
+        }
+        self._save_executor.submit(self._write_model_state, snapshot, file_path)
+
+    def _write_model_state(self, state_dict: Dict[str, Any], file_path: str):
+        """Writes a state dict snapshot to disk."""
         try:
-            torch.save(self.global_model.state_dict(), file_path)
+            # Local archival files: the legacy non-zip format skips per-entry CRC32 and staging copies.
+            torch.save(state_dict, file_path, pickle_protocol=pickle.HIGHEST_PROTOCOL, _use_new_zipfile_serialization=False)
             self.logger.info(f"Model state saved to {file_path}")
         except Exception as e:
             self.logger.error(f"Failed to save model state: {e}")
@@ -190,12 +370,22 @@ class ModelManager:
             "last_aggregation": self.last_aggregated_model_details
         }
         
-    def get_metrics_history(self) -> List[Dict[str, Any]]:
-        """Returns the stored model metrics history."""
-        return self.metrics_history
+    def get_metrics_history(self, full: bool = False) -> List[Dict[str, Any]]:
+        """
+        Returns the in-memory window of recent model metrics, or with `full` the
+        complete history read back from disk.
+        """
+        if not full:
+            return list(self.metrics_history)
+        self.flush_metrics_history()
+        try:
+            return self._read_metrics_file()
+        except (IOError, orjson.JSONDecodeError) as e:
+            self.logger.error(f"Failed to read metrics history from {self.metrics_log_path}: {e}")
+            return list(self.metrics_history)
 
     def add_metrics_to_history(self, round_number: int, metrics: Dict[str, Any], aggregation_method: str):
-        """Adds new metrics to the history and saves it to a file."""
+        """Adds new metrics to the history and queues them for the background writer."""
         metrics_entry = {
             "round": round_number,
             "timestamp": datetime.datetime.now().isoformat(),
@@ -204,4 +394,4 @@ class ModelManager:
         }
         self.metrics_history.append(metrics_entry)
         self.logger.info(f"Added metrics for round {round_number} to history.")
-        self._save_metrics_history()
\ No newline at end of file
+        self._metrics_queue.put(metrics_entry)
\ No newline at end of file
@@ -0,0 +1,62 @@
+# serialization.py
+
+import io
+import json
+import struct
+import torch
+from typing import Dict, Any, Optional
+
+# Raw tensor framing: MAGIC, 4-byte little-endian header length, JSON header of
+# [name, dtype, shape, nbytes] entries, then each tensor's bytes back to back.
+# An int8-quantized float tensor's entry carries a fifth element, its scale.
+STATE_DICT_MAGIC = b"FLSD"
+STATE_DICT_HEADER_LEN = struct.Struct("<I")
+
+
+def _quantize_int8(tensor: torch.Tensor):
+    """Symmetric per-tensor int8 quantization; returns the int8 tensor and its float scale."""
+    tensor = tensor.to(torch.float32)
+    scale = tensor.abs().max().item() / 127.0 if tensor.numel() else 0.0
+    if scale == 0.0: scale = 1.0
+    return torch.round(tensor / scale).clamp_(-127, 127).to(torch.int8), scale
+
+
+def serialize_model_state(state_dict: Dict[str, Any], dtype: Optional[torch.dtype] = None) -> bytes:
+    """Serializes a PyTorch model state dictionary into a byte stream.
+    Floating-point tensors are cast to `dtype` first when one is given; torch.int8
+    quantizes each of them symmetrically with a per-tensor scale."""
+    header, payloads = [], []
+    for name, tensor in state_dict.items():
+        tensor = tensor.detach().cpu()
+        scale = None
+        if dtype is torch.int8 and tensor.is_floating_point(): tensor, scale = _quantize_int8(tensor)
+        elif dtype is not None and tensor.is_floating_point(): tensor = tensor.to(dtype)
+        # A memoryview over the tensor's own storage; the final join is the only copy of the data.
+        raw = memoryview(tensor.contiguous().reshape(-1).view(torch.uint8).numpy())
+        entry = [name, str(tensor.dtype).split(".")[-1], list(tensor.shape), raw.nbytes]
+        if scale is not None: entry.append(scale)
+        header.append(entry)
+        payloads.append(raw)
+    header_bytes = json.dumps(header).encode("utf-8")
+    return b"".join([STATE_DICT_MAGIC, STATE_DICT_HEADER_LEN.pack(len(header_bytes)), header_bytes, *payloads])
+
+
+def deserialize_model_state(data: bytes) -> Dict[str, Any]:
+    """Deserializes a byte stream back into a PyTorch model state dictionary."""
+    if not data.startswith(STATE_DICT_MAGIC):
+        # Payload from a peer still using torch.save; the restricted unpickler only rebuilds tensors and containers.
+        return torch.load(io.BytesIO(data), map_location='cpu', weights_only=True)
+    (header_len,) = STATE_DICT_HEADER_LEN.unpack_from(data, 4)
+    header = json.loads(data[8:8 + header_len])
+    # One writable copy of the message, unless it already is one; every tensor is a view into it.
+    buffer = data if isinstance(data, bytearray) else bytearray(data)
+    offset = 8 + header_len
+    state_dict = {}
+    for name, dtype_name, shape, nbytes, *scale in header:
+        tensor_dtype = getattr(torch, dtype_name)
+        count = nbytes // torch.empty((), dtype=tensor_dtype).element_size()
+        tensor = torch.frombuffer(buffer, dtype=tensor_dtype, count=count, offset=offset).reshape(shape) if count else torch.empty(shape, dtype=tensor_dtype)
+        # Quantized tensors come back as float32, ready for aggregation.
+        state_dict[name] = tensor.to(torch.float32).mul_(scale[0]) if scale else tensor
+        offset += nbytes
+    return state_dict
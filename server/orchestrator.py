@@ -3,19 +3,19 @@
 import asyncio
 import logging
 import torch
-import io
 import datetime
 import time
-from typing import TYPE_CHECKING, List, Dict, Any, Set, Optional
+from typing import TYPE_CHECKING, AbstractSet, List, Dict, Any, Set, Optional, Tuple
 from enum import Enum
-from collections import defaultdict
+from collections import defaultdict, deque
 
 from log_manager.log_manager import ContextAdapter
 
-from sam.sam import aggregate_model_weights_securely
+from sam.sam import aggregate_model_weights_securely, UpdateAccumulator
+from model_manager.serialization import serialize_model_state, deserialize_model_state
 from adrm.adrm_engine import ADRMEngine
 from ppm.ppm import PPM
-from sam.sss import SecretSharing
+from sam.sss import SecretSharing, LagrangeAccumulator
 from ppm.he import HomomorphicEncryption
 
 if TYPE_CHECKING:
@@ -36,28 +36,28 @@ class OrchestratorState(Enum):
     STANDBY = "STANDBY"
 
 
-def serialize_model_state(state_dict: Dict[str, Any]) -> bytes:
-    """Serializes a PyTorch model state dictionary into a byte stream."""
-    buffer = io.BytesIO()
-    torch.save(state_dict, buffer)
-    return buffer.getvalue()
+# States from which the round loop may start a new round, built once rather than as a list per check.
+ROUND_STARTABLE_STATES = frozenset({OrchestratorState.IDLE, OrchestratorState.PAUSED_INSUFFICIENT_CLIENTS})
 
+# Floor for the round loop's sleep when nothing wakes it, so a zero check interval no longer spins the event loop.
+MIN_ROUND_CHECK_INTERVAL_SECONDS = 1.0
 
-def deserialize_model_state(data: bytes) -> Dict[str, Any]:
-    """Deserializes a byte stream back into a PyTorch model state dictionary."""
-    buffer = io.BytesIO(data)
-    return torch.load(buffer, map_location='cpu')
 
-
-def validate_state_dict(state_dict: Dict[str, Any], expected_keys: Set[str]) -> bool:
-    """Validates that a state dictionary contains all expected keys and no extra keys."""
+def validate_state_dict(state_dict: Dict[str, Any], expected_keys: AbstractSet[str]) -> bool:
+    """
+    Validates that a state dictionary contains all expected keys and no extra keys.
+    `expected_keys` is the model manager's precomputed frozenset; the received keys are compared as a view.
+    """
     if not isinstance(state_dict, dict): return False
-    received_keys = set(state_dict.keys())
-    missing_keys = expected_keys - received_keys
-    extra_keys = received_keys - expected_keys
-    if missing_keys: logging.warning(f"State dict is missing expected keys: {missing_keys}")
-    if extra_keys: logging.warning(f"State dict contains unexpected keys: {extra_keys}")
-    return not missing_keys and not extra_keys
+    received_keys = state_dict.keys()
+    # Equal sizes plus one membership pass; the difference sets are only built to report a mismatch.
+    if received_keys == expected_keys: return True
+    if logging.getLogger().isEnabledFor(logging.WARNING):
+        missing_keys = expected_keys - received_keys
+        extra_keys = received_keys - expected_keys
+        if missing_keys: logging.warning("State dict is missing expected keys: %s", missing_keys)
+        if extra_keys: logging.warning("State dict contains unexpected keys: %s", extra_keys)
+    return False
 
 
 class Orchestrator:
@@ -79,20 +79,35 @@ class Orchestrator:
         self.clients_per_round = self.cfg.get("federated_learning", {}).get("clients_per_round", 3)
         self.min_clients_for_round = self.cfg.get("federated_learning", {}).get("min_clients_for_round", 3)
         self.round_timeout = self.cfg.get("federated_learning", {}).get("round_timeout_seconds", 300)
+        # Precision the global model is sent to clients in. Clients load it with load_state_dict, which
+        # casts back to their parameters' dtype, and aggregation always accumulates in float32.
+        # "int8" sends per-tensor quantized weights, which clients dequantize to float32 on receipt.
+        self.model_transfer_dtype = getattr(torch, self.cfg.get("federated_learning", {}).get("model_transfer_dtype", "float16"))
+        # (global_model_version, serialized model) so every selected client is served the same bytes.
+        self._model_blob_cache: Optional[Tuple[int, bytes]] = None
         self.current_round_number = 0
         self.is_training_in_progress = False
         self.current_round_clients: Set[str] = set()
         self.model_updates: Dict[str, Any] = {}
-        self.model_shares: Dict[str, Dict[int, bytes]] = {}
+        self.update_accumulator = UpdateAccumulator()
+        # Global state dict taken once per round; its tensors alias the model's parameters.
+        self._round_model_state: Optional[Dict[str, Any]] = None
+        # Per-client SSS bundles, parsed on arrival so only their y values are held until reconstruction.
+        self._sss_accumulator: Dict[str, LagrangeAccumulator] = {}
         self.round_start_time = 0.0
         self.round_duration = 0.0
         self.aggregation_duration = 0.0 # NEW: Dedicated aggregation time
         self.last_aggregation_time = 0.0
         self.state = OrchestratorState.IDLE
-        self.aggregation_task = None
         self.round_check_interval = self.cfg.get("status_check_interval_seconds", 10)
         self.round_check_task = None
-        self.failed_updates_log: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        # Set whenever something may let the round loop make progress, so it sleeps instead of polling.
+        # The loop is the only task that changes round state, so no lock guards the transitions.
+        self._round_check_event = asyncio.Event()
+        self.client_manager.on_clients_changed = self._round_check_event.set
+        # Only the most recent failures are kept per client, so the log cannot grow across a long run.
+        failed_log_max_per_client = self.cfg.get("failed_log_max_per_client", 32)
+        self.failed_updates_log: Dict[str, deque] = defaultdict(lambda: deque(maxlen=failed_log_max_per_client))
         
         self.adrm_engine = adrm_engine
         self.ppm = ppm
@@ -101,7 +116,6 @@ class Orchestrator:
             num_shares=self.cfg.get("federated_learning", {}).get("sss_servers", 3),
             threshold=self.cfg.get("federated_learning", {}).get("sss_threshold", 2)
         )
-        self.round_lock = asyncio.Lock()
         
         self.logger.info(f"Orchestrator initialized. aggregation_method={self.aggregation_method}")
     
@@ -117,9 +131,20 @@ class Orchestrator:
         if client_id not in self.current_round_clients:
             self.logger.warning(f"Denied model request from {client_id}. Not selected for round {self.current_round_number}.")
             return None
-        self.logger.info(f"Preparing global model for client {client_id} for round {self.current_round_number}.")
-        global_model_state = self.model_manager.get_global_model_state()
-        return serialize_model_state(global_model_state)
+        self.logger.info("Preparing global model for client %s for round %s.", client_id, self.current_round_number)
+        return self._get_model_blob()
+
+    def get_global_model_data(self) -> bytes:
+        """Returns the serialized global model for the HTTP download endpoint, sharing the per-version blob."""
+        return self._get_model_blob()
+
+    def _get_model_blob(self) -> bytes:
+        """Returns the serialized global model, re-serializing only when the model version has changed."""
+        version = self.model_manager.global_model_version
+        if self._model_blob_cache is None or self._model_blob_cache[0] != version:
+            global_model_state = self.model_manager.get_global_model_state()
+            self._model_blob_cache = (version, serialize_model_state(global_model_state, self.model_transfer_dtype))
+        return self._model_blob_cache[1]
 
     async def start_training(self):
         if self.is_training_in_progress: self.logger.warning("Training is already in progress."); return
@@ -134,13 +159,11 @@ class Orchestrator:
                 self.logger.info(f"All {self.total_rounds} training rounds completed. Entering standby mode.")
                 self.state = OrchestratorState.STANDBY
             
-            if self.state in [OrchestratorState.IDLE, OrchestratorState.PAUSED_INSUFFICIENT_CLIENTS]:
+            if self.state in ROUND_STARTABLE_STATES:
                 eligible_clients_count = await self.client_manager.get_eligible_clients_count()
                 if eligible_clients_count >= self.clients_per_round:
                     self.logger.info(f"Sufficient clients ({eligible_clients_count}) available. Triggering new round.")
-                    async with self.round_lock:
-                        if self.state in [OrchestratorState.IDLE, OrchestratorState.PAUSED_INSUFFICIENT_CLIENTS]:
-                            await self.trigger_new_round()
+                    await self.trigger_new_round()
                 else:
                     if self.state != OrchestratorState.PAUSED_INSUFFICIENT_CLIENTS:
                         self.logger.info(f"Training paused: {eligible_clients_count}/{self.clients_per_round} clients available.")
@@ -148,39 +171,53 @@ class Orchestrator:
             
             elif self.state == OrchestratorState.WAITING_FOR_UPDATES:
                 elapsed_time = time.time() - self.round_start_time
+                if self._round_ready():
+                    # Shielded so stopping the loop lets a started aggregation finish, as it did when it ran as its own task.
+                    # A failure costs only this round: the aggregation's finally has already returned the state to IDLE.
+                    try: await asyncio.shield(self._aggregate_updates())
+                    except Exception as e: self.logger.exception(f"Aggregation for round {self.current_round_number} failed: {e}")
+                    continue
                 if elapsed_time > self.round_timeout:
                     self.logger.warning(f"Round {self.current_round_number} timed out after {elapsed_time:.2f} seconds.")
-                    async with self.round_lock:
-                        if self.state == OrchestratorState.WAITING_FOR_UPDATES:
-                            if len(self.model_updates) >= self.min_clients_for_round:
-                                self.logger.info(f"Timeout reached, but minimum updates ({len(self.model_updates)}/{self.min_clients_for_round}) received. Proceeding to aggregation.")
-                                if self.aggregation_task is None or self.aggregation_task.done():
-                                    self.aggregation_task = asyncio.create_task(self._run_aggregation_with_lock())
-                            else:
-                                self.logger.warning(f"Cancelling round {self.current_round_number} due to timeout. Not enough updates received.")
-                                self.model_updates = {}
-                                self.model_shares = {}
-                                self.current_round_clients = set()
-                                self.state = OrchestratorState.IDLE
+                    self.logger.warning(f"Cancelling round {self.current_round_number} due to timeout. Not enough updates received.")
+                    self.model_updates = {}
+                    self.update_accumulator.reset()
+                    self._sss_accumulator = {}
+                    self.current_round_clients = set()
+                    self.state = OrchestratorState.IDLE
 
             elif self.state == OrchestratorState.STANDBY: self.logger.debug("Orchestrator in standby.")
-            await asyncio.sleep(self.round_check_interval)
+            await self._wait_for_round_event()
+
+    async def _wait_for_round_event(self):
+        """Sleeps until a client or aggregation change wakes the round loop, the round deadline passes, or the next check is due."""
+        if self.state == OrchestratorState.WAITING_FOR_UPDATES:
+            timeout = max(self.round_start_time + self.round_timeout - time.time(), MIN_ROUND_CHECK_INTERVAL_SECONDS)
+        else:
+            timeout = max(self.round_check_interval, MIN_ROUND_CHECK_INTERVAL_SECONDS)
+        try: await asyncio.wait_for(self._round_check_event.wait(), timeout)
+        except asyncio.TimeoutError: pass
+        self._round_check_event.clear()
 
     async def trigger_new_round(self):
-        if self.state not in [OrchestratorState.IDLE, OrchestratorState.PAUSED_INSUFFICIENT_CLIENTS]:
+        if self.state not in ROUND_STARTABLE_STATES:
             self.logger.warning(f"Cannot start a new round from state: {self.state.value}"); return
         self.state = OrchestratorState.CLIENT_SELECTION
         self.current_round_number += 1
         self.logger.info(f"--- Starting training round {self.current_round_number}/{self.total_rounds} ---")
         self.round_start_time = time.time()
         self.model_updates = {}
-        self.model_shares = {}
+        self.update_accumulator.reset()
+        self._round_model_state = self.model_manager.get_global_model_state()
+        self._sss_accumulator = {}
         await self.client_manager.reset_round_clients()
         selected_clients_list = await self.client_manager.select_clients_for_round(self.clients_per_round)
         self.current_round_clients = set(selected_clients_list)
         if not self.current_round_clients:
             self.logger.warning("No clients selected. Pausing."); self.state = OrchestratorState.PAUSED_INSUFFICIENT_CLIENTS; return
         self.logger.info(f"Selected {len(self.current_round_clients)} clients for round {self.current_round_number}: {list(self.current_round_clients)}.")
+        # Serialize once, off the loop, before clients are signalled so their concurrent fetches all share one blob.
+        await asyncio.to_thread(self._get_model_blob)
         if self.scpm: self.scpm.trigger_model_update(self.current_round_number); self.logger.info("Model update triggered for clients.")
         self.state = OrchestratorState.WAITING_FOR_UPDATES
 
@@ -188,6 +225,17 @@ class Orchestrator:
         """
         Internal handler to process a successfully deserialized/decrypted update.
         """
+        # Decoding is awaited in a worker thread, so the round may have closed in the meantime.
+        if self.state != OrchestratorState.WAITING_FOR_UPDATES:
+            self.logger.warning(f"Dropping {privacy_method} update from {client_id}; the round closed while it was being decoded.")
+            return
+        if self._round_model_state is None: self._round_model_state = self.model_manager.get_global_model_state()
+        # Keys were validated on receipt; a wrong-shaped tensor would otherwise only fail inside the accumulator.
+        mismatched_key = next((key for key, value in self._round_model_state.items()
+                               if getattr(model_update_dict.get(key), "shape", None) != value.shape), None)
+        if mismatched_key is not None:
+            self.logger.warning(f"Dropping {privacy_method} update from {client_id}; tensor '{mismatched_key}' does not match the global model's shape.")
+            return
         is_valid_update = self.adrm_engine.process_update(client_id, model_update_dict)
         if not is_valid_update:
             self.logger.warning(f"Update from {client_id} was flagged by ADRM (Stage 1) and dropped.")
@@ -195,17 +243,23 @@ class Orchestrator:
 
         self.logger.info(f"Received valid {privacy_method} update from client {client_id}.")
         model_update_dict["privacy_method"] = privacy_method
+        previous_update = self.model_updates.get(client_id)
+        # Sum the update in now so aggregation only has to divide once the round closes. It is recorded
+        # only once it is in the sum, so model_updates and the accumulator always hold the same clients.
+        if previous_update is not None: self.update_accumulator.discard(client_id, previous_update, self._round_model_state)
+        try:
+            self.update_accumulator.add(client_id, model_update_dict, self._round_model_state)
+        except Exception:
+            if previous_update is not None: self.update_accumulator.add(client_id, previous_update, self._round_model_state)
+            raise
         self.model_updates[client_id] = model_update_dict
 
-        should_aggregate = (len(self.model_updates) >= len(self.current_round_clients) or
-                           len(self.model_updates) >= self.min_clients_for_round)
-        
-        if should_aggregate:
-            self.logger.info(f"Sufficient updates received ({len(self.model_updates)}). Minimum is {self.min_clients_for_round}. Triggering aggregation.")
-            if self.aggregation_task is None or self.aggregation_task.done():
-                self.aggregation_task = asyncio.create_task(self._run_aggregation_with_lock())
+        n_updates = len(self.model_updates)
+        if self._round_ready():
+            self.logger.info("Sufficient updates received (%d). Minimum is %d. Triggering aggregation.", n_updates, self.min_clients_for_round)
+            self._round_check_event.set()
         else:
-            self.logger.info(f"Collected {len(self.model_updates)}/{self.min_clients_for_round} (min) updates. Waiting for more.")
+            self.logger.info("Collected %d/%d (min) updates. Waiting for more.", n_updates, self.min_clients_for_round)
 
     async def receive_he_update(self, client_id: str, model_update_bytes: bytes):
         """Receives and processes a Homomorphically Encrypted (HE) model update."""
@@ -215,8 +269,8 @@ class Orchestrator:
             return
 
         try:
-            model_update_dict = self.he_handler.decrypt_model_state(model_update_bytes)
-            current_model_keys = set(self.model_manager.get_global_model_state().keys())
+            model_update_dict = await asyncio.to_thread(lambda: deserialize_model_state(self.he_handler.decrypt_bytes(model_update_bytes)))
+            current_model_keys = self.model_manager.get_global_model_keys()
             if not validate_state_dict(model_update_dict, current_model_keys):
                 self.logger.warning(f"Invalid HE model structure from {client_id}.")
                 return
@@ -233,8 +287,8 @@ class Orchestrator:
             return
             
         try:
-            model_update_dict = deserialize_model_state(model_update_bytes)
-            current_model_keys = set(self.model_manager.get_global_model_state().keys())
+            model_update_dict = await asyncio.to_thread(deserialize_model_state, model_update_bytes)
+            current_model_keys = self.model_manager.get_global_model_keys()
             if not validate_state_dict(model_update_dict, current_model_keys):
                 self.logger.warning(f"Invalid Normal model structure from {client_id}.")
                 return
@@ -246,40 +300,42 @@ class Orchestrator:
     async def receive_sss_share(self, client_id: str, share_index: int, share_data: bytes, total_shares: int):
         self.logger.debug(f"Processing SSS share {share_index+1}/{total_shares} from {client_id}.")
         if self.state != OrchestratorState.WAITING_FOR_UPDATES: return
-        if client_id not in self.model_shares: self.model_shares[client_id] = {}
-        
         if client_id in self.model_updates:
             self.logger.debug(f"Ignoring share from {client_id}; their model has already been reconstructed.")
             return
+
+        acc = self._sss_accumulator.get(client_id)
+        if acc is None: acc = self._sss_accumulator[client_id] = self.sss_handler.new_accumulator()
+        try:
+            # JSON parsing of the bundle runs off the loop; its bytes are not kept once parsed.
+            await asyncio.to_thread(acc.add, share_data)
+        except (ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"Skipping invalid SSS share {share_index} from {client_id}: {e}")
+            return
+        # The bundle may have been parsed after the round moved on or the client's model was reconstructed.
+        if self._sss_accumulator.get(client_id) is not acc or acc.count < self.sss_handler.threshold: return
+
+        self.logger.info(f"Sufficient shares ({acc.count}/{self.sss_handler.threshold}) received from {client_id}. Attempting reconstruction.")
+        # Taken out before the await so shares arriving meanwhile cannot start a second reconstruction.
+        del self._sss_accumulator[client_id]
+        try:
+            # Tensors are views straight into the reconstructed buffer.
+            reconstructed_bytes = await asyncio.to_thread(acc.finalize)
+            reconstructed_update = deserialize_model_state(reconstructed_bytes)
             
-        self.model_shares[client_id][share_index] = share_data
-
-        if len(self.model_shares[client_id]) >= self.sss_handler.threshold:
-            self.logger.info(f"Sufficient shares ({len(self.model_shares[client_id])}/{self.sss_handler.threshold}) received from {client_id}. Attempting reconstruction.")
-            try:
-                all_shares = list(self.model_shares[client_id].values())
-                reconstructed_update = self.sss_handler.reconstruct_model(all_shares)
-                
-                current_model_keys = set(self.model_manager.get_global_model_state().keys())
-                if not validate_state_dict(reconstructed_update, current_model_keys):
-                    self.logger.warning(f"Invalid SSS model structure from {client_id}.")
-                    return
-                
-                await self._handle_received_update(client_id, reconstructed_update, "SSS")
-            except Exception as e:
-                self.logger.exception(f"Failed to reconstruct SSS update from {client_id}: {e}")
-            finally:
-                if client_id in self.model_shares: 
-                    del self.model_shares[client_id]
-
-    async def _run_aggregation_with_lock(self):
-        """A wrapper for the aggregation process that acquires the lock."""
-        async with self.round_lock:
-            if self.state == OrchestratorState.WAITING_FOR_UPDATES:
-                await self._aggregate_updates()
-            else:
-                self.logger.warning(f"Aggregation was triggered but aborted because state changed to '{self.state.value}'.")
+            current_model_keys = self.model_manager.get_global_model_keys()
+            if not validate_state_dict(reconstructed_update, current_model_keys):
+                self.logger.warning(f"Invalid SSS model structure from {client_id}.")
+                return
+            
+            await self._handle_received_update(client_id, reconstructed_update, "SSS")
+        except Exception as e:
+            self.logger.exception(f"Failed to reconstruct SSS update from {client_id}: {e}")
 
+    def _round_ready(self) -> bool:
+        """True once every selected client, or at least the round minimum, has delivered an update."""
+        n_updates = len(self.model_updates)
+        return n_updates >= len(self.current_round_clients) or n_updates >= self.min_clients_for_round
 
     async def _aggregate_updates(self):
         if self.state != OrchestratorState.WAITING_FOR_UPDATES: 
@@ -293,17 +349,22 @@ class Orchestrator:
         aggregation_start_time = time.time()
 
         try:
-            if len(self.model_updates) < self.min_clients_for_round:
-                self.logger.warning(f"Aggregation aborted. Only {len(self.model_updates)}/{self.min_clients_for_round} (min) updates available.")
+            n_updates = len(self.model_updates)
+            if n_updates < self.min_clients_for_round:
+                self.logger.warning(f"Aggregation aborted. Only {n_updates}/{self.min_clients_for_round} (min) updates available.")
                 self.state = OrchestratorState.IDLE
                 return
 
             self.logger.info("AGGREGATION STEP 1.1: Starting ADRM Stage 2 (Cross-Client) check.")
-            outlier_ids = self.adrm_engine.detect_outliers_in_group(self.model_updates)
+            # Per-client magnitude scoring is CPU-bound; receive paths reject updates while AGGREGATING, so the dict is stable.
+            # The outlier decision stays on the loop: its responses schedule tasks and persist the blocklist.
+            magnitudes = await asyncio.to_thread(self.adrm_engine.compute_update_magnitudes, self.model_updates)
+            outlier_ids = set(self.adrm_engine.detect_outliers_in_group(self.model_updates, magnitudes))
             self.logger.info("AGGREGATION STEP 1.2: ADRM Stage 2 check finished.")
-            for client_id in outlier_ids:
-                if client_id in self.model_updates:
-                    del self.model_updates[client_id]
+            if outlier_ids:
+                for client_id in outlier_ids:
+                    if client_id in self.model_updates: self.update_accumulator.discard(client_id, self.model_updates[client_id], self._round_model_state)
+                self.model_updates = {cid: update for cid, update in self.model_updates.items() if cid not in outlier_ids}
             
             if not self.model_updates:
                 self.logger.warning("Aggregation aborted. All updates were flagged as outliers.")
@@ -311,9 +372,9 @@ class Orchestrator:
                 return
 
             self.logger.info("AGGREGATION STEP 2.1: Starting Privacy Audit.")
-            client_ids = list(self.model_updates.keys())
-            raw_updates = [self.model_updates[cid] for cid in client_ids]
-            privacy_methods = {self.model_updates[cid].get("privacy_method", "Normal") for cid in client_ids}
+            # Take the round's updates as one snapshot instead of re-indexing the dict per client.
+            raw_updates = list(self.model_updates.values())
+            privacy_methods = {update.get("privacy_method", "Normal") for update in raw_updates}
             
             if len(privacy_methods) > 1:
                 self.logger.error(f"Aggregation failed: Inconsistent privacy methods. Found: {privacy_methods}")
@@ -335,7 +396,10 @@ class Orchestrator:
             self.logger.info(f"Privacy method '{current_privacy_method}' detected. Using aggregation method: '{final_aggregation_method}'.")
 
             self.logger.info(f"AGGREGATION STEP 3.1: Calling SAM to aggregate {len(raw_updates)} updates using '{final_aggregation_method}'.")
-            aggregated_model = aggregate_model_weights_securely(raw_updates, self.model_manager.get_global_model_state(), method=final_aggregation_method)
+            # Tensor math runs in a worker thread so heartbeats and API calls keep being served while the round aggregates.
+            global_model_state = self.model_manager.get_global_model_state()
+            avg_update = self.update_accumulator.average(global_model_state)
+            aggregated_model = await asyncio.to_thread(aggregate_model_weights_securely, raw_updates, global_model_state, method=final_aggregation_method, avg_update=avg_update)
             self.logger.info("AGGREGATION STEP 3.2: SAM aggregation finished. Updating global model.")
             self.model_manager.update_global_model(aggregated_model)
             self.logger.info("AGGREGATION STEP 3.3: Global model updated.")
@@ -349,7 +413,7 @@ class Orchestrator:
             self.logger.info(f"AGGREGATION STEP 4.1: Aggregation for round {self.current_round_number} complete. "
                              f"Total Round Duration: {self.round_duration:.2f}s | Aggregation Time: {self.aggregation_duration:.2f}s")
             
-            metrics = self.model_manager.evaluate_model()
+            metrics = await asyncio.to_thread(self.model_manager.evaluate_model)
 
             # <<< FIX: Call the function to record the aggregation event >>>
             self.model_manager.record_aggregation_event(self.current_round_number, metrics)
@@ -362,6 +426,10 @@ class Orchestrator:
 
         finally:
             self.model_updates = {}
+            self.update_accumulator.reset()
+            # The model now owns new tensors; drop the round's aliases of the old ones.
+            self._round_model_state = None
+            self._round_check_event.set()
             if self.current_round_number >= self.total_rounds:
                 self.state = OrchestratorState.FINISHED
             else:
@@ -412,4 +480,4 @@ class Orchestrator:
         return len(self.model_updates)
 
     def get_failed_updates_log(self) -> Dict[str, List[Dict[str, Any]]]:
-        return self.failed_updates_log
\ No newline at end of file
+        return {client_id: list(entries) for client_id, entries in self.failed_updates_log.items() if entries}
\ No newline at end of file
@@ -1,8 +1,8 @@
 import logging
-import torch
-import io
 from typing import Dict, Any
 
+from model_manager.serialization import deserialize_model_state
+
 class HomomorphicEncryption:
     """
     A placeholder class for Homomorphic Encryption (HE) on the server side.
@@ -30,9 +30,15 @@ class HomomorphicEncryption:
         """
         self.logger.info("Decrypting model state from client.")
         
-        buffer = io.BytesIO(encrypted_bytes)
-        # **FIX:** Added weights_only=False to allow loading the full state dictionary.
-        state_dict = torch.load(buffer, map_location='cpu', weights_only=False)
+        state_dict = deserialize_model_state(encrypted_bytes)
             
         self.logger.info("Model state decrypted successfully.")
-        return state_dict
\ No newline at end of file
+        return state_dict
+
+    def decrypt_bytes(self, encrypted_bytes: bytes) -> bytes:
+        """
+        Decrypts an encrypted model state into its serialized plaintext bytes,
+        leaving deserialization to the caller.
+        """
+        self.logger.info("Decrypting serialized model state from client.")
+        return encrypted_bytes
\ No newline at end of file
@@ -1,6 +1,7 @@
 import logging
+import operator
 import torch
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 from log_manager.log_manager import ContextAdapter
 
@@ -14,25 +15,114 @@ fedadam_state = {
     "epsilon": 1e-8, "server_learning_rate": 0.01
 }
 
+# Flat float32 scratch vectors reused by _average_updates across rounds, since the
+# model size does not change between them. Rounds are serialised by the Orchestrator.
+aggregation_buffers = {"acc": None, "flat": None}
+
+# Flatten layout of the global model, worked out once since the architecture is fixed for the run.
+# "gather" pulls every tensor out of a state dict in layout order in one C-level call, and
+# "float32" marks the common all-float32 model whose unflatten needs no dtype casts.
+model_layout = {"keys": None, "shapes": None, "dtypes": None, "numels": None, "total": 0, "gather": None, "float32": False}
+
 # ----------------------------
 # Aggregation Strategies
 # ----------------------------
 
-def fedavg(client_updates: List[Dict[str, Any]], global_model_state: Dict[str, Any]) -> Dict[str, Any]:
+def _get_layout(global_model_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the cached flatten layout, rebuilding it only if the model's keys change."""
+    keys = tuple(global_model_state.keys())
+    if model_layout["keys"] != keys:
+        values = [global_model_state[key] for key in keys]
+        numels = [value.numel() for value in values]
+        dtypes = [value.dtype for value in values]
+        gather = operator.itemgetter(*keys) if len(keys) > 1 else (lambda state: (state[keys[0]],))
+        model_layout.update(keys=keys, shapes=[value.shape for value in values], dtypes=dtypes, numels=numels, total=sum(numels),
+                            gather=gather, float32=all(dtype == torch.float32 for dtype in dtypes))
+    return model_layout
+
+def _flatten_update(update: Dict[str, Any], global_model_state: Dict[str, Any], out: Optional[torch.Tensor] = None) -> torch.Tensor:
+    """Concatenates an update's tensors, in global model order, into one flat float32 vector."""
+    layout = _get_layout(global_model_state)
+    try:
+        parts = list(map(torch.flatten, layout["gather"](update)))
+    except KeyError:
+        parts = [update[key].reshape(-1) if key in update else torch.zeros(n) for key, n in zip(layout["keys"], layout["numels"])]
+    if out is None: return torch.cat(parts).to(torch.float32)
+    return torch.cat(parts, out=out)
+
+def _unflatten_update(flat: torch.Tensor, global_model_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Splits a flat vector back into tensors shaped and typed like the global model."""
+    layout = _get_layout(global_model_state)
+    if layout["float32"] and flat.dtype == torch.float32:
+        return dict(zip(layout["keys"], map(torch.Tensor.view, flat.split(layout["numels"]), layout["shapes"])))
+    return {key: chunk.view(shape).to(dtype) for key, shape, dtype, chunk in zip(layout["keys"], layout["shapes"], layout["dtypes"], flat.split(layout["numels"]))}
+
+def _average_updates(client_updates: List[Dict[str, Any]], global_model_state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Element-wise mean of the client updates, reduced over a single flat float32 vector.
+    Float32 results are views into a buffer that is reused by the next call.
+    """
+    total = _get_layout(global_model_state)["total"]
+    acc, flat = aggregation_buffers["acc"], aggregation_buffers["flat"]
+    if acc is None or acc.numel() != total:
+        acc, flat = torch.empty(total, dtype=torch.float32), torch.empty(total, dtype=torch.float32)
+        aggregation_buffers.update(acc=acc, flat=flat)
+    acc.zero_()
+    # One vectorised add per client over the whole model instead of one per tensor.
+    for update in client_updates:
+        acc.add_(_flatten_update(update, global_model_state, out=flat))
+    acc.div_(len(client_updates))
+    return _unflatten_update(acc, global_model_state)
+
+class UpdateAccumulator:
+    """
+    Running sum of flattened client updates, built as updates arrive so the
+    end-of-round average is a single divide. Only the sum is kept: a resubmitted
+    update or an ADRM outlier is re-flattened from the caller's copy and subtracted.
+    """
+    def __init__(self):
+        self.total: Optional[torch.Tensor] = None
+        self.mean: Optional[torch.Tensor] = None
+        self.scratch: Optional[torch.Tensor] = None
+        self.client_ids: Set[str] = set()
+
+    def _flatten(self, update: Dict[str, Any], global_model_state: Dict[str, Any]) -> torch.Tensor:
+        total = _get_layout(global_model_state)["total"]
+        if self.total is None or self.total.numel() != total:
+            self.total = torch.zeros(total, dtype=torch.float32)
+            self.mean, self.scratch = torch.empty_like(self.total), torch.empty_like(self.total)
+            self.client_ids = set()
+        return _flatten_update(update, global_model_state, out=self.scratch)
+
+    def add(self, client_id: str, update: Dict[str, Any], global_model_state: Dict[str, Any]):
+        """Adds a client's update; discard the client's previous update first when replacing it."""
+        flat = self._flatten(update, global_model_state)
+        self.total.add_(flat)
+        self.client_ids.add(client_id)
+
+    def discard(self, client_id: str, update: Dict[str, Any], global_model_state: Dict[str, Any]):
+        """Subtracts an update previously added for `client_id`."""
+        if client_id not in self.client_ids: return
+        self.total.sub_(self._flatten(update, global_model_state))
+        self.client_ids.discard(client_id)
+
+    def average(self, global_model_state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Mean of the contributions, written into a buffer reused by the next round."""
+        if not self.client_ids: return None
+        torch.div(self.total, len(self.client_ids), out=self.mean)
+        return _unflatten_update(self.mean, global_model_state)
+
+    def reset(self):
+        """Clears the contributions but keeps the sum buffer for the next round."""
+        self.client_ids = set()
+        if self.total is not None: self.total.zero_()
+
+def fedavg(client_updates: List[Dict[str, Any]], global_model_state: Dict[str, Any], avg_update: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Standard Federated Averaging (equal weights)."""
     if not client_updates:
         return global_model_state
     
-    aggregated_update = {k: torch.zeros_like(v) for k, v in global_model_state.items()}
-    
-    for update in client_updates:
-        for key in aggregated_update:
-            if key in update:
-                aggregated_update[key] += update[key]
-                
-    num_clients = len(client_updates)
-    for key in aggregated_update:
-        aggregated_update[key] /= num_clients
+    aggregated_update = avg_update if avg_update is not None else _average_updates(client_updates, global_model_state)
         
     new_global_state = {k: global_model_state[k] + aggregated_update[k] for k in global_model_state}
     logger.info("Performed FedAvg aggregation.")
@@ -43,26 +133,30 @@ def fedadam(
     global_model_state: Dict[str, Any],
     state: Dict[str, Any]
 ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
-    """Applies a server-side Adam optimization step to the global model."""
-    if state["m"] is None:
-        state["m"] = {k: torch.zeros_like(v) for k, v in avg_update.items()}
-        state["v"] = {k: torch.zeros_like(v) for k, v in avg_update.items()}
-        
-    new_global_state = {}
-    for key in global_model_state:
-        state["m"][key] = state["beta1"] * state["m"][key] + (1 - state["beta1"]) * avg_update[key]
-        state["v"][key] = state["beta2"] * state["v"][key] + (1 - state["beta2"]) * (avg_update[key] ** 2)
-        
-        m_hat = state["m"][key] / (1 - state["beta1"])
-        v_hat = state["v"][key] / (1 - state["beta2"])
+    """
+    Applies a server-side Adam optimization step to the global model.
+    The moments are kept as flat float32 vectors so the step is a handful of whole-model ops.
+    """
+    grad = _flatten_update(avg_update, global_model_state)
+    if state["m"] is None or state["m"].numel() != grad.numel():
+        state["m"], state["v"] = torch.zeros_like(grad), torch.zeros_like(grad)
         
-        update_value = state["server_learning_rate"] * m_hat / (torch.sqrt(v_hat) + state["epsilon"])
-        new_global_state[key] = global_model_state[key] + update_value
+    beta1, beta2 = state["beta1"], state["beta2"]
+    m, v = state["m"], state["v"]
+    # Moments are updated in place; the only new vectors are the denominator and the result.
+    m.mul_(beta1).add_(grad, alpha=1 - beta1)
+    v.mul_(beta2).addcmul_(grad, grad, value=1 - beta2)
+    
+    denom = v.div(1 - beta2).sqrt_().add_(state["epsilon"])
+    # global + lr * m_hat / (sqrt(v_hat) + eps), with m_hat's bias correction folded into the step size.
+    step_size = state["server_learning_rate"] / (1 - beta1)
+    new_flat = torch.addcdiv(_flatten_update(global_model_state, global_model_state), m, denom, value=step_size)
+    new_global_state = _unflatten_update(new_flat, global_model_state)
         
     logger.info("Applied FedAdam optimization step.")
     return new_global_state, state
 
-def homomorphic_aggregation(client_updates: List[Dict[str, Any]], global_model_state: Dict[str, Any]) -> Dict[str, Any]:
+def homomorphic_aggregation(client_updates: List[Dict[str, Any]], global_model_state: Dict[str, Any], avg_update: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Handles aggregation of HE-decrypted updates by applying a stabilizing optimizer.
     """
@@ -70,14 +164,8 @@ def homomorphic_aggregation(client_updates: List[Dict[str, Any]], global_model_s
     if not client_updates:
         return global_model_state
     
-    # First, compute the simple average of the decrypted updates.
-    avg_update = {k: torch.zeros_like(v) for k, v in global_model_state.items()}
-    for update in client_updates:
-        for key in avg_update:
-            if key in update:
-                avg_update[key] += update[key]
-    for key in avg_update:
-        avg_update[key] /= len(client_updates)
+    # First, compute the simple average of the decrypted updates, unless it was accumulated on arrival.
+    if avg_update is None: avg_update = _average_updates(client_updates, global_model_state)
             
     # Apply the FedAdam optimizer to the averaged update.
     global fedadam_state
@@ -93,10 +181,11 @@ def aggregate_model_weights_securely(
     client_updates: List[Dict[str, Any]],
     global_model_state: Dict[str, Any],
     method: str = "fedadam",
-    client_sizes: Optional[List[int]] = None
+    avg_update: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Coordinates the secure aggregation process based on the commanded method from the Orchestrator.
+    `avg_update` is the precomputed mean of `client_updates`, when the caller accumulated it on arrival.
     """
     if not client_updates:
         logger.warning("No client updates for aggregation. Returning global model state.")
@@ -105,17 +194,11 @@ def aggregate_model_weights_securely(
     logger.info(f"SAM dispatching to aggregation method: {method}")
 
     if method == "fedavg":
-        return fedavg(client_updates, global_model_state)
+        return fedavg(client_updates, global_model_state, avg_update)
         
     elif method == "fedadam":
         # Calculate the simple average of the updates first
-        avg_update = {k: torch.zeros_like(v) for k, v in global_model_state.items()}
-        for update in client_updates:
-            for key in avg_update:
-                if key in update:
-                    avg_update[key] += update[key]
-        for key in avg_update:
-            avg_update[key] /= len(client_updates)
+        if avg_update is None: avg_update = _average_updates(client_updates, global_model_state)
             
         # Pass the averaged update to the FedAdam optimizer
         global fedadam_state
@@ -124,7 +207,7 @@ def aggregate_model_weights_securely(
         return new_model
 
     elif method == "homomorphic_aggregation":
-        return homomorphic_aggregation(client_updates, global_model_state)
+        return homomorphic_aggregation(client_updates, global_model_state, avg_update)
         
     else:
         raise ValueError(f"Unknown aggregation method commanded: {method}")
\ No newline at end of file
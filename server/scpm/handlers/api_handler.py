@@ -3,7 +3,7 @@
 import logging
 from aiohttp import web
 import json
-from typing import TYPE_CHECKING, Dict, Any, List, Callable, Coroutine, Tuple
+from typing import TYPE_CHECKING, Dict, Any, List, Callable, Coroutine, Optional, Tuple
 import torch
 import aiohttp_cors
 import asyncio
@@ -67,6 +67,8 @@ class ApiHandler:
         
         self.runner = None
         self.site = None
+        # (version, JSON-ready model state); rebuilt only when the global model version changes.
+        self._model_json_cache: Optional[Tuple[int, Dict[str, Any]]] = None
 
         self._setup_routes()
         self._setup_cors()
@@ -249,10 +251,12 @@ class ApiHandler:
     @api_handler
     async def get_global_model_json(self, request: web.Request) -> Tuple[Dict[str, Any], int]:
         """Returns the global model state and version as a JSON response."""
-        model_state = await self._ensure_awaited(self.model_manager.get_global_model_state())
-        version = await self._ensure_awaited(self.model_manager.get_global_model_version())
-        serializable_state = {k: v.cpu().numpy().tolist() for k, v in model_state.items()}
-        return {"model_state": serializable_state, "version": version}, 200
+        version = self.model_manager.global_model_version
+        if self._model_json_cache is None or self._model_json_cache[0] != version:
+            model_state = self.model_manager.get_global_model_state()
+            serializable_state = {k: v.cpu().numpy().tolist() for k, v in model_state.items()}
+            self._model_json_cache = (version, serializable_state)
+        return {"model_state": self._model_json_cache[1], "version": version}, 200
 
     async def get_global_model_bytes(self, request: web.Request) -> web.Response:
         """Provides the global model as a binary stream for clients."""
@@ -344,8 +348,9 @@ class ApiHandler:
 
     @api_handler
     async def get_metrics_history(self, request: web.Request) -> Tuple[Dict[str, Any], int]:
-        """Fetches the full history of model evaluation metrics."""
-        metrics_history = await self._ensure_awaited(self.model_manager.get_metrics_history())
+        """Fetches recent model evaluation metrics, or the full history with `?full=true`."""
+        full = request.query.get("full", "").lower() == "true"
+        metrics_history = await asyncio.to_thread(self.model_manager.get_metrics_history, full)
         return {"metrics_history": metrics_history}, 200
 
     @api_handler
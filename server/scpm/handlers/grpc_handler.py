@@ -8,7 +8,6 @@ import datetime
 import io
 import torch
 import json
-from concurrent import futures
 from typing import TYPE_CHECKING, Any, Dict, Union, List
 
 # Imports for gRPC generated code
@@ -42,6 +41,16 @@ logger = logging.getLogger(__name__)
 # Corrected path to the certifications directory
 CERTS_DIR = os.path.join(os.path.dirname(__file__), "..", "certifications")
 
+# Model payloads travel as single messages, so lift gRPC's 4 MiB default cap and use larger
+# HTTP/2 frames and write buffers so a model is sent in far fewer frames and syscalls.
+MAX_MESSAGE_LENGTH = 64 * 1024 * 1024
+GRPC_CHANNEL_OPTIONS = [
+    ('grpc.max_send_message_length', MAX_MESSAGE_LENGTH),
+    ('grpc.max_receive_message_length', MAX_MESSAGE_LENGTH),
+    ('grpc.http2.max_frame_size', 1 << 20),
+    ('grpc.http2.write_buffer_size', 1 << 20),
+]
+
 
 class InsecureGreeterServicer(client_service_pb2_grpc.GreeterServicer):
     """
@@ -165,6 +174,8 @@ class ClientServicer(client_service_pb2_grpc.ClientServiceServicer):
         self.client_manager = client_manager
         self.scpm = scpm
         self.orchestrator = orchestrator
+        # The model blob is shared by every client in a round, so its response message is built once and reused.
+        self._model_response_cache: Union[tuple, None] = None
         self.logger = ContextAdapter(logging.getLogger(self.__class__.__name__), {"component": self.__class__.__name__})
         self.logger.info("gRPC ClientServicer initialized.")
 
@@ -176,7 +187,7 @@ class ClientServicer(client_service_pb2_grpc.ClientServiceServicer):
                 cn = auth_context['x509_common_name'][0]
                 if isinstance(cn, bytes):
                     cn = cn.decode('utf-8')
-                self.logger.debug(f"Successfully extracted CN from auth context: {cn}")
+                self.logger.debug("Successfully extracted CN from auth context: %s", cn)
                 return cn
             
             self.logger.error("Could not find Common Name in gRPC auth context.")
@@ -216,7 +227,7 @@ class ClientServicer(client_service_pb2_grpc.ClientServiceServicer):
         if not await self.client_manager.update_client_heartbeat(client_id):
             return client_service_pb2.HeartbeatResponse(success=False, message="Client ID not recognized.")
 
-        self.logger.debug(f"Received heartbeat from client '{client_id}'.")
+        self.logger.debug("Received heartbeat from client '%s'.", client_id)
         
         new_round_available = self.orchestrator.is_client_in_current_round(client_id)
         
@@ -243,12 +254,16 @@ class ClientServicer(client_service_pb2_grpc.ClientServiceServicer):
 
         try:
             model_bytes = self.orchestrator.prepare_model_for_client(client_id)
-            
-            return client_service_pb2.FetchModelResponse(
+            if model_bytes is not None and self._model_response_cache is not None and self._model_response_cache[0] is model_bytes:
+                return self._model_response_cache[1]
+
+            response = client_service_pb2.FetchModelResponse(
                 success=True,
                 model_data=model_bytes,
                 message="Global model fetched successfully."
             )
+            if model_bytes is not None: self._model_response_cache = (model_bytes, response)
+            return response
         except Exception as e:
             self.logger.error(f"Failed to fetch global model for client '{client_id}': {e}", exc_info=True)
             return client_service_pb2.FetchModelResponse(
@@ -269,18 +284,18 @@ class ClientServicer(client_service_pb2_grpc.ClientServiceServicer):
         privacy_method = request.privacy_method
         model_update_data = request.model_update
         
-        self.logger.info(f"Received model update from '{client_id}' with declared method: '{privacy_method}'.")
+        self.logger.info("Received model update from '%s' with declared method: '%s'.", client_id, privacy_method)
 
         try:
             if privacy_method == "HE":
                 await self.orchestrator.receive_he_update(client_id, model_update_data)
-                self.logger.info(f"HE update from '{client_id}' forwarded to orchestrator.")
+                self.logger.debug("HE update from '%s' forwarded to orchestrator.", client_id)
                 return client_service_pb2.SendModelUpdateResponse(success=True, message="HE update received.")
 
             elif privacy_method == "Normal":
                 # Ensure you have a 'receive_normal_update' method in your Orchestrator class
                 await self.orchestrator.receive_normal_update(client_id, model_update_data)
-                self.logger.info(f"Normal update from '{client_id}' forwarded to orchestrator.")
+                self.logger.debug("Normal update from '%s' forwarded to orchestrator.", client_id)
                 return client_service_pb2.SendModelUpdateResponse(success=True, message="Normal update received.")
             
             else:
@@ -311,7 +326,7 @@ class ClientServicer(client_service_pb2_grpc.ClientServiceServicer):
                 total_shares=request.total_shares
             )
             
-            self.logger.info(f"Received SSS share {request.share_index + 1}/{request.total_shares} from client '{client_id}'.")
+            self.logger.debug("Received SSS share %d/%d from client '%s'.", request.share_index + 1, request.total_shares, client_id)
             
             return client_service_pb2.SendModelUpdateSharesResponse(
                 success=True,
@@ -348,12 +363,12 @@ class GrpcHandler(BaseCommunicationHandler):
                 require_client_auth=True
             )
 
-            self.secure_server = grpc.aio.server(futures.ThreadPoolExecutor(max_workers=10))
+            self.secure_server = grpc.aio.server(options=GRPC_CHANNEL_OPTIONS)
             client_service_pb2_grpc.add_ClientServiceServicer_to_server(self.client_servicer, self.secure_server)
             self.secure_server.add_secure_port('[::]:50051', server_credentials)
             self.logger.info("Secure gRPC server configured on port 50051 with mTLS.")
 
-            self.insecure_server = grpc.aio.server(futures.ThreadPoolExecutor(max_workers=10))
+            self.insecure_server = grpc.aio.server()
             client_service_pb2_grpc.add_GreeterServicer_to_server(self.insecure_greeter_servicer, self.insecure_server)
             self.insecure_server.add_insecure_port('[::]:50052')
             self.logger.info("Insecure gRPC server for registration configured on port 50052.")
@@ -11,7 +11,7 @@ from typing import TYPE_CHECKING, List, Any, Dict
 from scpm.handlers.grpc_handler import GrpcHandler
 from scpm.handlers.api_handler import ApiHandler
 from log_manager.log_manager import ContextAdapter
-from log_manager.log_manager import LOG_DIR
+from log_manager.log_manager import LOG_DIR, flush_json_file_handlers
 from log_manager.decorators import handle_exceptions
 
 if TYPE_CHECKING:
@@ -236,6 +236,8 @@ class ServerControlPlaneManager:
 
     def update_client_count(self, count: int):
         """Updates the internal state with the number of connected clients."""
+        # Called on every heartbeat; only log (and flush the JSON log file) when the count actually changes.
+        if count == self._connected_clients_count: return
         self._connected_clients_count = count
         self.logger.info(f"Dashboard status updated: Connected clients count is {count}.")
 
@@ -325,6 +327,7 @@ class ServerControlPlaneManager:
         Reads the latest logs from the server log file and returns them as a list
         of dictionaries.
         """
+        flush_json_file_handlers()
         log_path = os.path.join(LOG_DIR, "server_logs.json")
         logs = []
         if os.path.exists(log_path):
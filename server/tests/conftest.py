@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+# Server modules import each other relative to server/, as when the server is run from there.
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVER_DIR not in sys.path: sys.path.insert(0, SERVER_DIR)
+
+_original_cwd = os.getcwd()
+
+def pytest_configure(config):
+    # Some server modules create their database/ and logs/ directories relative to the working
+    # directory at import time; keep those out of the source tree.
+    os.chdir(tempfile.mkdtemp(prefix="server-tests-"))
+
+def pytest_unconfigure(config):
+    os.chdir(_original_cwd)
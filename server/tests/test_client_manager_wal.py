@@ -0,0 +1,81 @@
+import asyncio
+import os
+
+import client_manager as cm
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Snapshot and WAL paths are relative to the working directory.
+    monkeypatch.chdir(tmp_path)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_reload_applies_wal_on_top_of_snapshot():
+    async def scenario():
+        m = cm.ClientManager({})
+        await m.add_or_update_client("a", "10.0.0.1", "edge")
+        await m.add_or_update_client("b", "10.0.0.2", "edge")
+        await m.stop_status_checker()
+        # Logged after the checkpoint, so only the WAL carries them.
+        await m.penalize_client("a", penalty=30)
+        await m.deregister_client("b")
+        await m.add_or_update_client("c", "10.0.0.3", "edge")
+        m._wal.flush()
+
+    run(scenario())
+    reloaded = cm.ClientManager({})
+    assert sorted(reloaded.connected_clients) == ["a", "c"]
+    assert reloaded.connected_clients["a"].reputation == 70
+
+
+def test_replay_after_rotation_without_a_finished_snapshot():
+    async def scenario():
+        m = cm.ClientManager({})
+        await m.add_or_update_client("a", "10.0.0.1", "edge")
+        # A checkpoint rotated the WAL, then the process died before the snapshot was written.
+        async with m._lock: m._rotate_wal_nolock()
+        await m.add_or_update_client("b", "10.0.0.2", "edge")
+        m._wal.flush()
+
+    run(scenario())
+    assert os.path.exists(cm.ROTATED_CLIENT_WAL_FILE)
+    assert not os.path.exists(cm.CLIENT_DATA_FILE)
+
+    reloaded = cm.ClientManager({})
+    assert sorted(reloaded.connected_clients) == ["a", "b"]
+    # The replayed state is folded into a fresh snapshot and both segments are retired.
+    assert os.path.exists(cm.CLIENT_DATA_FILE)
+    assert not os.path.exists(cm.ROTATED_CLIENT_WAL_FILE)
+    assert os.path.getsize(cm.CLIENT_WAL_FILE) == 0
+    assert sorted(cm.ClientManager({}).connected_clients) == ["a", "b"]
+
+
+def test_torn_trailing_record_from_a_crash_mid_write_is_skipped():
+    async def scenario():
+        m = cm.ClientManager({})
+        await m.add_or_update_client("a", "10.0.0.1", "edge")
+        m._wal.flush()
+
+    run(scenario())
+    with open(cm.CLIENT_WAL_FILE, "a") as f: f.write('{"op": "add", "cid": "b", "ip_add')
+
+    reloaded = cm.ClientManager({})
+    assert sorted(reloaded.connected_clients) == ["a"]
+
+
+def test_leftover_temp_snapshot_does_not_replace_the_last_good_one():
+    async def scenario():
+        m = cm.ClientManager({})
+        await m.add_or_update_client("a", "10.0.0.1", "edge")
+        await m.stop_status_checker()
+
+    run(scenario())
+    with open(cm.TEMP_CLIENT_DATA_FILE, "wb") as f: f.write(b"\x00partial")
+
+    reloaded = cm.ClientManager({})
+    assert sorted(reloaded.connected_clients) == ["a"]
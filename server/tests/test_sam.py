@@ -0,0 +1,48 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from sam.sam import UpdateAccumulator
+
+
+@pytest.fixture
+def global_state():
+    return {"w": torch.zeros(2, 3), "b": torch.zeros(3)}
+
+
+def update(value):
+    return {"w": torch.full((2, 3), float(value)), "b": torch.full((3,), float(value)), "privacy_method": "Normal"}
+
+
+def test_average_of_added_updates(global_state):
+    acc = UpdateAccumulator()
+    acc.add("a", update(1), global_state)
+    acc.add("b", update(3), global_state)
+    mean = acc.average(global_state)
+    assert torch.allclose(mean["w"], torch.full((2, 3), 2.0))
+    assert torch.allclose(mean["b"], torch.full((3,), 2.0))
+
+
+def test_replacing_an_update_discards_the_previous_one(global_state):
+    acc = UpdateAccumulator()
+    acc.add("a", update(1), global_state)
+    acc.add("b", update(3), global_state)
+    acc.discard("a", update(1), global_state)
+    acc.add("a", update(5), global_state)
+    assert torch.allclose(acc.average(global_state)["w"], torch.full((2, 3), 4.0))
+
+
+def test_discarding_an_unknown_client_is_a_no_op(global_state):
+    acc = UpdateAccumulator()
+    acc.add("a", update(2), global_state)
+    acc.discard("missing", update(100), global_state)
+    assert torch.allclose(acc.average(global_state)["b"], torch.full((3,), 2.0))
+
+
+def test_reset_clears_contributions(global_state):
+    acc = UpdateAccumulator()
+    acc.add("a", update(2), global_state)
+    acc.reset()
+    assert acc.average(global_state) is None
+    acc.add("b", update(6), global_state)
+    assert torch.allclose(acc.average(global_state)["w"], torch.full((2, 3), 6.0))
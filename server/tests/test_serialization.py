@@ -0,0 +1,67 @@
+import io
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from model_manager.serialization import STATE_DICT_MAGIC, deserialize_model_state, serialize_model_state
+
+
+def make_state():
+    torch.manual_seed(0)
+    return {
+        "fc.weight": torch.randn(4, 3),
+        "fc.bias": torch.randn(4),
+        "bn.num_batches_tracked": torch.tensor(7, dtype=torch.int64),
+        "empty": torch.empty(0, 5),
+    }
+
+
+def test_round_trip_is_exact():
+    state = make_state()
+    data = serialize_model_state(state)
+    assert data.startswith(STATE_DICT_MAGIC)
+    restored = deserialize_model_state(data)
+    assert list(restored) == list(state)
+    for key, value in state.items():
+        assert restored[key].dtype == value.dtype
+        assert restored[key].shape == value.shape
+        assert torch.equal(restored[key], value)
+
+
+def test_bytearray_input_is_viewed_not_copied():
+    data = bytearray(serialize_model_state({"w": torch.arange(6, dtype=torch.float32)}))
+    restored = deserialize_model_state(data)
+    restored["w"][0] = 42.0
+    assert deserialize_model_state(data)["w"][0] == 42.0
+
+
+def test_bfloat16_transfer_casts_only_floating_tensors():
+    state = make_state()
+    restored = deserialize_model_state(serialize_model_state(state, torch.bfloat16))
+    assert restored["fc.weight"].dtype == torch.bfloat16
+    assert torch.equal(restored["fc.weight"], state["fc.weight"].to(torch.bfloat16))
+    assert restored["bn.num_batches_tracked"].dtype == torch.int64
+    assert restored["bn.num_batches_tracked"].item() == 7
+
+
+def test_int8_transfer_dequantizes_within_half_a_step():
+    state = make_state()
+    state["zeros"] = torch.zeros(3)
+    restored = deserialize_model_state(serialize_model_state(state, torch.int8))
+    for key in ("fc.weight", "fc.bias"):
+        assert restored[key].dtype == torch.float32
+        step = state[key].abs().max().item() / 127.0
+        assert (restored[key] - state[key]).abs().max().item() <= step / 2 + 1e-6
+    assert torch.equal(restored["zeros"], state["zeros"])
+    assert restored["bn.num_batches_tracked"].dtype == torch.int64
+    assert restored["empty"].shape == (0, 5)
+
+
+def test_legacy_torch_save_payload_is_loaded():
+    state = make_state()
+    buffer = io.BytesIO()
+    torch.save(state, buffer)
+    restored = deserialize_model_state(buffer.getvalue())
+    for key, value in state.items():
+        assert torch.equal(restored[key], value)
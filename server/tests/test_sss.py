@@ -0,0 +1,62 @@
+import json
+import os
+import random
+
+import pytest
+
+pytest.importorskip("torch")
+
+from sam.sss import SecretSharing
+
+
+def legacy_bundle(bundle: bytes) -> bytes:
+    """Rewrites a bundle in the older one-record-per-chunk layout."""
+    decoded = json.loads(bundle)
+    records = [{"c": i, "s": [decoded["x"], y]} for i, y in enumerate(decoded["y"])]
+    return json.dumps({"l": decoded["l"], "d": records}).encode("utf-8")
+
+
+@pytest.mark.parametrize("length", [1, 2, 3, 4, 5, 100, 1001])
+def test_any_threshold_subset_reconstructs_the_bytes(length):
+    sharer = SecretSharing(num_shares=5, threshold=3)
+    data = os.urandom(length)
+    bundles = sharer.split_bytes(data)
+    for subset in (bundles[:3], bundles[2:], [bundles[4], bundles[0], bundles[2]]):
+        acc = sharer.new_accumulator()
+        for bundle in subset: acc.add(bundle)
+        assert bytes(acc.finalize()) == data
+
+
+def test_matches_per_chunk_reconstruction_and_accepts_extra_shares():
+    sharer = SecretSharing(num_shares=4, threshold=2)
+    data = os.urandom(301)
+    bundles = sharer.split_bytes(data)
+    random.shuffle(bundles)
+    acc = sharer.new_accumulator()
+    for bundle in bundles: acc.add(bundle)
+    assert acc.count == 4
+    assert bytes(acc.finalize()) == bytes(sharer.reconstruct_bytes(bundles)) == data
+
+
+def test_legacy_bundles_are_accepted():
+    sharer = SecretSharing(num_shares=3, threshold=2)
+    data = os.urandom(50)
+    acc = sharer.new_accumulator()
+    for bundle in sharer.split_bytes(data)[:2]: acc.add(legacy_bundle(bundle))
+    assert bytes(acc.finalize()) == data
+
+
+def test_too_few_shares_is_an_error():
+    sharer = SecretSharing(num_shares=3, threshold=3)
+    acc = sharer.new_accumulator()
+    acc.add(sharer.split_bytes(b"secret")[0])
+    with pytest.raises(ValueError):
+        acc.finalize()
+
+
+def test_bundles_of_different_payloads_are_rejected():
+    sharer = SecretSharing(num_shares=3, threshold=2)
+    acc = sharer.new_accumulator()
+    acc.add(sharer.split_bytes(os.urandom(30))[0])
+    with pytest.raises(ValueError):
+        acc.add(sharer.split_bytes(os.urandom(60))[1])